@@ -0,0 +1,73 @@
+"""
+Load-test the classifier endpoint against bench/stub_openai.py.
+Every prompt is unique so the classification cache never answers; the stub's
+max_in_flight shows how many completions one worker kept open at once.
+
+1. python bench/stub_openai.py --latency-ms 500
+2. OPENAI_BASE_URL=http://127.0.0.1:9000/v1 OPENAI_API_KEY=stub \
+   uvicorn src.main:app --workers 1
+3. python bench/classify_load.py --requests 500 --concurrency 100
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+import httpx
+
+from concurrency import percentile
+
+
+async def run(url, stub_url, total, concurrency):
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(timeout=60.0) as client:
+        await client.post(f"{stub_url}/stats/reset")
+
+        async def classify(index):
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post(
+                    f"{url}/api/classify/",
+                    json={"prompt": f"Explain recursion, variant {index} {uuid.uuid4()}"},
+                )
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(classify(index) for index in range(total)))
+        elapsed = time.perf_counter() - started
+        stub_stats = (await client.get(f"{stub_url}/stats")).json()
+
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "upstream_max_in_flight": stub_stats["max_in_flight"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--stub-url", default="http://127.0.0.1:9000")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.url, args.stub_url, args.requests, args.concurrency))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
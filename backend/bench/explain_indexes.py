@@ -0,0 +1,160 @@
+"""
+Check that the hot lookup queries use the secondary indexes on a large dataset.
+Builds schema.sql plus migration_003 in a scratch schema, seeds it with
+generate_series (1M anteaters and 1M has_accessory rows by default), runs
+EXPLAIN on each query and exits non-zero if an expected index is not used.
+The scratch schema is dropped afterwards.
+
+From project root:  python backend/bench/explain_indexes.py
+From backend:      python bench/explain_indexes.py --users 50000
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(backend_dir / "src"))
+
+from sqlalchemy import text
+
+from db import get_sync_db_engine
+
+SCHEMA_DIR = backend_dir / "schema"
+SCRATCH_SCHEMA = "bench_explain"
+# Send schema and seed SQL as written; with parameters psycopg would read
+# the % in "n % 50" as a placeholder.
+VERBATIM = {"no_parameters": True}
+
+SEED_SQL = """
+INSERT INTO users (name, email, ants)
+SELECT 'user ' || n, 'user' || n || '@bench.local', n % 50
+FROM generate_series(1, {users}) AS n;
+
+INSERT INTO accessories (name, price, type, image_url, description)
+SELECT 'accessory ' || n, 5 + n % 20, 'type-' || (n % {types}), NULL, NULL
+FROM generate_series(1, {accessories}) AS n;
+
+-- {per_user} anteaters per user, only the last one alive.
+INSERT INTO anteater (name, health, is_dead, uid)
+SELECT 'anteater', 100, k < {per_user}, u
+FROM generate_series(1, {users}) AS u, generate_series(1, {per_user}) AS k;
+
+INSERT INTO has_accessory (uid, accessory_id, anteater_id)
+SELECT u, 1 + (u * {per_user} + k) % {accessories}, CASE WHEN k = 1 THEN u * {per_user} ELSE NULL END
+FROM generate_series(1, {users}) AS u, generate_series(1, {per_user}) AS k;
+
+ANALYZE;
+"""
+
+# (description, query, expected index)
+CHECKS = [
+    (
+        "alive anteater for a user",
+        "SELECT id FROM anteater WHERE uid = :uid AND is_dead = FALSE",
+        "uq_anteater_alive_per_user",
+    ),
+    (
+        "all anteaters for a user",
+        "SELECT id, name, health, is_dead, uid FROM anteater WHERE uid = :uid",
+        "idx_anteater_uid",
+    ),
+    (
+        "user inventory",
+        """
+        SELECT ha.id, ha.uid, ha.accessory_id, ha.anteater_id,
+               a.name, a.price, a.type, a.image_url, a.description
+        FROM has_accessory ha
+        JOIN accessories a ON ha.accessory_id = a.id
+        WHERE ha.uid = :uid
+        ORDER BY ha.id DESC
+        """,
+        "idx_has_accessory_uid_accessory_id",
+    ),
+    (
+        "shop view ownership join",
+        """
+        SELECT a.id, ha.id AS user_accessory_id
+        FROM accessories a
+        LEFT JOIN has_accessory ha ON a.id = ha.accessory_id AND ha.uid = :uid
+        ORDER BY a.id
+        """,
+        "idx_has_accessory_uid_accessory_id",
+    ),
+    (
+        "equipped accessories",
+        "SELECT id FROM has_accessory WHERE anteater_id = :anteater_id ORDER BY id",
+        "idx_has_accessory_anteater_id",
+    ),
+    (
+        "owners of an accessory",
+        "SELECT id FROM has_accessory WHERE accessory_id = :accessory_id",
+        "idx_has_accessory_accessory_id",
+    ),
+    (
+        "accessories of a type",
+        "SELECT id FROM accessories WHERE type = :type",
+        "idx_accessories_type",
+    ),
+]
+
+
+def index_names(plan):
+    names = set()
+    if "Index Name" in plan:
+        names.add(plan["Index Name"])
+    for child in plan.get("Plans", []):
+        names |= index_names(child)
+    return names
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=250000)
+    parser.add_argument("--per-user", type=int, default=4)
+    parser.add_argument("--accessories", type=int, default=10000)
+    parser.add_argument("--types", type=int, default=100)
+    args = parser.parse_args()
+
+    engine = get_sync_db_engine()
+    params = {
+        "uid": args.users // 2,
+        "anteater_id": (args.users // 2) * args.per_user,
+        "accessory_id": args.accessories // 2,
+        "type": "type-7",
+    }
+    report = []
+
+    with engine.connect() as connection:
+        connection.exec_driver_sql(f"DROP SCHEMA IF EXISTS {SCRATCH_SCHEMA} CASCADE")
+        connection.exec_driver_sql(f"CREATE SCHEMA {SCRATCH_SCHEMA}")
+        connection.exec_driver_sql(f"SET search_path TO {SCRATCH_SCHEMA}")
+        try:
+            connection.exec_driver_sql((SCHEMA_DIR / "schema.sql").read_text(), execution_options=VERBATIM)
+            connection.exec_driver_sql(
+                (SCHEMA_DIR / "migration_003_add_hot_lookup_indexes.sql").read_text(), execution_options=VERBATIM
+            )
+            connection.exec_driver_sql(SEED_SQL.format(
+                users=args.users,
+                per_user=args.per_user,
+                accessories=args.accessories,
+                types=args.types,
+            ), execution_options=VERBATIM)
+            for description, query, expected in CHECKS:
+                plan = connection.execute(text(f"EXPLAIN (FORMAT JSON) {query}"), params).scalar_one()
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                used = index_names(plan[0]["Plan"])
+                report.append({"query": description, "expected": expected, "used": sorted(used), "ok": expected in used})
+        finally:
+            connection.rollback()
+            connection.exec_driver_sql(f"DROP SCHEMA IF EXISTS {SCRATCH_SCHEMA} CASCADE")
+            connection.commit()
+
+    print(json.dumps(report, indent=2))
+    if not all(entry["ok"] for entry in report):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Hammer one anteater with parallel health deltas and check the final totals.
+Pure damage and pure healing bursts are order-independent, so the expected
+end state can be computed up front and any lost update shows up as a mismatch.
+
+From project root:  python backend/bench/health_contention.py --anteater-id 1
+From backend:      python bench/health_contention.py --anteater-id 1 --delta 2 --requests 200
+"""
+import argparse
+import asyncio
+import json
+import sys
+
+import httpx
+
+ANT_HEALTH_MULTIPLIER = 12
+MAX_HEALTH = 100
+
+
+def expected_state(health, ants, delta, count):
+    total = delta * ANT_HEALTH_MULTIPLIER * count
+    if total < 0:
+        damage = -total
+        absorbed = min(damage, ants)
+        return max(0, health - (damage - absorbed)), ants - absorbed
+    healed = health + total
+    return min(healed, MAX_HEALTH), ants + max(0, healed - MAX_HEALTH)
+
+
+async def run(url, anteater_id, delta, total, concurrency):
+    async with httpx.AsyncClient(base_url=url, timeout=30.0) as client:
+        anteater = (await client.get(f"/api/anteaters/{anteater_id}")).raise_for_status().json()
+        user = (await client.get(f"/api/ants/user/{anteater['uid']}")).raise_for_status().json()
+        health, ants = expected_state(anteater["health"], user["ants"], delta, total)
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def patch():
+            async with semaphore:
+                response = await client.patch(
+                    f"/api/anteaters/{anteater_id}/health",
+                    json={"delta": delta},
+                )
+                response.raise_for_status()
+
+        await asyncio.gather(*(patch() for _ in range(total)))
+
+        final_anteater = (await client.get(f"/api/anteaters/{anteater_id}")).json()
+        final_user = (await client.get(f"/api/ants/user/{anteater['uid']}")).json()
+
+    return {
+        "requests": total,
+        "delta": delta,
+        "expected": {"health": health, "ants": ants},
+        "actual": {"health": final_anteater["health"], "ants": final_user["ants"]},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--anteater-id", type=int, required=True)
+    parser.add_argument("--delta", type=int, default=1, help="use a single sign so the outcome is order-independent")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=25)
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.url, args.anteater_id, args.delta, args.requests, args.concurrency))
+    print(json.dumps(result, indent=2))
+    if result["expected"] != result["actual"]:
+        print("Mismatch: concurrent health updates were lost.", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Per-request CPU of serving a 10k-row list the old way (model_validate per
+row, then FastAPI's response_model pass) versus the JsonList fast path.
+Both routes live in a throwaway app fed from memory, so only validation and
+serialization are measured; responses are checked to be identical.
+
+From project root:  python backend/bench/json_path.py
+From backend:      python bench/json_path.py --rows 10000 --requests 50
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(backend_dir))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.accessory import UserAccessoryResponse
+from src.pagination import JsonList
+
+
+def make_rows(count):
+    return [
+        {
+            "id": n,
+            "uid": 1 + n % 500,
+            "accessory_id": 1 + n % 40,
+            "anteater_id": n if n % 3 == 0 else None,
+            "name": f"accessory {n % 40}",
+            "price": 5 + n % 20,
+            "type": ("hat", "glasses", "scarf", "shirt")[n % 4],
+            "image_url": f"https://cdn.example/accessories/{n % 40}.png",
+            "description": None,
+        }
+        for n in range(1, count + 1)
+    ]
+
+
+def build_app(rows):
+    app = FastAPI()
+    fast = JsonList(UserAccessoryResponse)
+
+    @app.get("/model-validate", response_model=list[UserAccessoryResponse])
+    def model_validate() -> list[UserAccessoryResponse]:
+        return [UserAccessoryResponse.model_validate(row) for row in rows]
+
+    @app.get("/json-list", response_model=list[UserAccessoryResponse])
+    def json_list():
+        return fast.response(rows)
+
+    return app
+
+
+def measure(client, path, requests):
+    client.get(path)
+    cpu_started = time.process_time()
+    wall_started = time.perf_counter()
+    for _ in range(requests):
+        client.get(path)
+    return {
+        "cpu_ms_per_request": round((time.process_time() - cpu_started) / requests * 1000, 2),
+        "wall_ms_per_request": round((time.perf_counter() - wall_started) / requests * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=30)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    with TestClient(build_app(rows)) as client:
+        if client.get("/model-validate").json() != client.get("/json-list").json():
+            raise SystemExit("fast path returned a different body")
+        report = {
+            "rows": args.rows,
+            "requests": args.requests,
+            "model_validate": measure(client, "/model-validate", args.requests),
+            "json_list": measure(client, "/json-list", args.requests),
+        }
+
+    report["cpu_speedup"] = round(
+        report["model_validate"]["cpu_ms_per_request"] / report["json_list"]["cpu_ms_per_request"], 2
+    )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Per-request CPU cost of building a text() statement versus reusing one from
+src/queries.py, plus (with --db) the latency of a hot lookup with and
+without server-side prepared statements.
+
+SQLAlchemy caches compiled SQL either way; what building per request adds
+is text()'s bind-parameter parsing and a fresh cache key on every call,
+which this measures by timing exactly that part of execute().
+
+From project root:  python backend/bench/query_build.py
+From backend:      python bench/query_build.py --iterations 200000 --db --uid 1
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+import timeit
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(backend_dir / "src"))
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+import queries
+from db import get_psycopg_database_url
+
+from concurrency import percentile
+
+
+def build_cost(iterations):
+    statement = queries.USER_ACCESSORY_DETAIL
+    sql = statement.text
+
+    def per_request():
+        text(sql)._generate_cache_key()
+
+    def shared():
+        statement._generate_cache_key()
+
+    results = {}
+    for name, func in (("per_request_text", per_request), ("shared_statement", shared)):
+        seconds = min(timeit.repeat(func, number=iterations, repeat=5))
+        results[name] = {"us_per_call": round(seconds / iterations * 1e6, 3)}
+    return results
+
+
+async def lookup_latency(uid, iterations, prepare_threshold):
+    engine = create_async_engine(
+        get_psycopg_database_url(),
+        pool_size=1,
+        max_overflow=0,
+        connect_args={"prepare_threshold": prepare_threshold},
+    )
+    samples = []
+    try:
+        async with engine.connect() as connection:
+            for _ in range(iterations):
+                started = time.perf_counter()
+                await connection.execute(queries.ALIVE_ANTEATER_WITH_ACCESSORIES, {"uid": uid, "include_accessories": True})
+                samples.append(time.perf_counter() - started)
+    finally:
+        await engine.dispose()
+    return {
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=100000)
+    parser.add_argument("--db", action="store_true", help="also time a hot query against DB_CONNECTION")
+    parser.add_argument("--db-iterations", type=int, default=2000)
+    parser.add_argument("--uid", type=int, default=1)
+    args = parser.parse_args()
+
+    report = {"build": build_cost(args.iterations)}
+    if args.db:
+        report["lookup"] = {
+            "unprepared": asyncio.run(lookup_latency(args.uid, args.db_iterations, None)),
+            "prepared": asyncio.run(lookup_latency(args.uid, args.db_iterations, 0)),
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Local stand-in for the OpenAI chat completions API with configurable latency.
+Point the backend at it with OPENAI_BASE_URL=http://127.0.0.1:9000/v1 and any
+OPENAI_API_KEY. GET /stats reports how many completions were in flight at once.
+Requests with "stream": true get the same content as SSE chunks, the first
+after --latency-ms and each following one --chunk-ms later.
+
+From project root:  python backend/bench/stub_openai.py --latency-ms 800
+From backend:      python bench/stub_openai.py --port 9000 --latency-ms 300
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+TAXONOMY_VALUES = (-3, -2, -1, 1, 2)
+CHUNK_CHARS = 4
+
+
+def build_app(latency_ms: float, chunk_ms: float = 20) -> FastAPI:
+    app = FastAPI(title="OpenAI stub")
+    state = {"in_flight": 0, "max_in_flight": 0, "completions": 0}
+
+    def completion_content(prompt: str) -> str:
+        # Deterministic verdict per prompt so cached and fresh answers agree.
+        digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+        return json.dumps({
+            "value": TAXONOMY_VALUES[digest[0] % len(TAXONOMY_VALUES)],
+            "suggestion": "Try explaining your own reasoning first.",
+        })
+
+    def usage(prompt: str) -> dict:
+        return {"prompt_tokens": len(prompt.split()), "completion_tokens": 12, "total_tokens": len(prompt.split()) + 12}
+
+    async def stream_completion(body: dict, prompt: str):
+        state["in_flight"] += 1
+        state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+        try:
+            await asyncio.sleep(latency_ms / 1000)
+            content = completion_content(prompt)
+            completion_id = f"chatcmpl-stub-{state['completions'] + 1}"
+
+            def chunk(choices, **extra):
+                return "data: " + json.dumps({
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": body.get("model", "stub"),
+                    "choices": choices,
+                    **extra,
+                }) + "\n\n"
+
+            yield chunk([{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}])
+            for start in range(0, len(content), CHUNK_CHARS):
+                if start:
+                    await asyncio.sleep(chunk_ms / 1000)
+                yield chunk([{"index": 0, "delta": {"content": content[start:start + CHUNK_CHARS]}, "finish_reason": None}])
+            yield chunk([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+            if (body.get("stream_options") or {}).get("include_usage"):
+                yield chunk([], usage=usage(prompt))
+            yield "data: [DONE]\n\n"
+            state["completions"] += 1
+        finally:
+            state["in_flight"] -= 1
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        prompt = body["messages"][-1]["content"]
+        if body.get("stream"):
+            return StreamingResponse(stream_completion(body, prompt), media_type="text/event-stream")
+
+        state["in_flight"] += 1
+        state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+        try:
+            await asyncio.sleep(latency_ms / 1000)
+        finally:
+            state["in_flight"] -= 1
+        state["completions"] += 1
+
+        return {
+            "id": f"chatcmpl-stub-{state['completions']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": completion_content(prompt)},
+                "finish_reason": "stop",
+            }],
+            "usage": usage(prompt),
+        }
+
+    @app.get("/v1/models/{model_id:path}")
+    async def retrieve_model(model_id: str) -> dict:
+        return {"id": model_id, "object": "model", "created": 0, "owned_by": "stub"}
+
+    @app.get("/stats")
+    async def stats() -> dict:
+        return dict(state)
+
+    @app.post("/stats/reset")
+    async def reset_stats() -> dict:
+        state.update(in_flight=0, max_in_flight=0, completions=0)
+        return dict(state)
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-ms", type=float, default=500)
+    parser.add_argument("--chunk-ms", type=float, default=20, help="delay between streamed chunks")
+    args = parser.parse_args()
+
+    uvicorn.run(build_app(args.latency_ms, args.chunk_ms), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""
+End-to-end benchmark suite for the PocketZot API.
+
+Builds schema.sql in a scratch schema, seeds it with generate_series, starts
+bench/stub_openai.py and the app (uvicorn --factory src.main:create_app)
+against that schema, then drives each scenario for --duration seconds with
+--concurrency virtual users:
+
+    classify_health  POST /api/classify/, then PATCH the anteater's health
+                     with the returned value (the extension's main loop)
+    shop_open        GET /api/users/{uid}/snapshot and GET /api/accessories
+    buy_equip        buy a random accessory, then equip it
+    mixed            the three above weighted 70/25/5, like real traffic
+
+Latency percentiles per operation and throughput per scenario are printed
+as JSON (and written to --output), tagged with the current commit, so runs
+from two commits can be diffed. DB_CONNECTION must point at a Postgres the
+suite may create and drop the scratch schema in.
+
+From project root:  python backend/bench/suite.py --output bench.json
+From backend:      python bench/suite.py --users 20000 --duration 30 --openai-latency-ms 300
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+from sqlalchemy import make_url
+
+backend_dir = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(backend_dir / "src"))
+
+from db import get_database_url, get_sync_db_engine
+
+from concurrency import percentile
+
+SCHEMA_DIR = backend_dir / "schema"
+SCRATCH_SCHEMA = "bench_suite"
+# Send schema and seed SQL as written; with parameters psycopg would read
+# the % in "n % 20" as a placeholder.
+VERBATIM = {"no_parameters": True}
+
+SEED_SQL = """
+INSERT INTO users (name, email, ants)
+SELECT 'user ' || n, 'user' || n || '@bench.example.com', 1000000000
+FROM generate_series(1, {users}) AS n;
+
+-- One alive anteater per user, so anteater id = user id.
+INSERT INTO anteater (name, health, is_dead, uid)
+SELECT 'anteater ' || n, 100, FALSE, n
+FROM generate_series(1, {users}) AS n;
+
+INSERT INTO accessories (name, price, type, image_url, description)
+SELECT 'accessory ' || n, 5 + n % 20, (ARRAY['hat', 'glasses', 'scarf', 'shirt'])[1 + n % 4], NULL, NULL
+FROM generate_series(1, {accessories}) AS n;
+
+INSERT INTO has_accessory (uid, accessory_id)
+SELECT u, 1 + (u * {owned} + k) % {accessories}
+FROM generate_series(1, {users}) AS u, generate_series(1, {owned}) AS k;
+
+ANALYZE;
+"""
+
+PROMPTS = [
+    "Write my essay about the French Revolution",
+    "Explain how photosynthesis works",
+    "Compare mitosis and meiosis",
+    "Ask me guiding questions about recursion",
+    "Why is my argument about free will convincing?",
+    "Summarize chapter 3 for me",
+    "Help me think step by step through this proof",
+]
+
+
+class Recorder:
+    def __init__(self):
+        self.samples: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+
+    async def call(self, client, name, method, path, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, path, **kwargs)
+        except httpx.HTTPError:
+            self.errors[name] = self.errors.get(name, 0) + 1
+            return None
+        self.samples.setdefault(name, []).append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.errors[name] = self.errors.get(name, 0) + 1
+            return None
+        return response
+
+    def report(self, elapsed):
+        operations = {}
+        for name in sorted(set(self.samples) | set(self.errors)):
+            samples = self.samples.get(name, [])
+            operations[name] = {
+                "count": len(samples),
+                "errors": self.errors.get(name, 0),
+                "p50_ms": round(percentile(samples, 50) * 1000, 2),
+                "p95_ms": round(percentile(samples, 95) * 1000, 2),
+                "p99_ms": round(percentile(samples, 99) * 1000, 2),
+            }
+        requests = sum(len(samples) for samples in self.samples.values())
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "requests": requests,
+            "throughput_rps": round(requests / elapsed, 1) if elapsed else 0.0,
+            "operations": operations,
+        }
+
+
+async def classify_health(client, recorder, rng, args):
+    uid = rng.randint(1, args.users)
+    response = await recorder.call(
+        client, "classify", "POST", "/api/classify/",
+        json={"prompt": f"{rng.choice(PROMPTS)} #{rng.randint(1, args.distinct_prompts)}", "user_id": uid},
+    )
+    if response is None:
+        return
+    await recorder.call(
+        client, "health_patch", "PATCH", f"/api/anteaters/{uid}/health",
+        json={"delta": response.json()["value"]},
+    )
+
+
+async def shop_open(client, recorder, rng, args):
+    uid = rng.randint(1, args.users)
+    await recorder.call(client, "snapshot", "GET", f"/api/users/{uid}/snapshot")
+    await recorder.call(client, "catalog", "GET", "/api/accessories")
+
+
+async def buy_equip(client, recorder, rng, args):
+    uid = rng.randint(1, args.users)
+    accessory_id = rng.randint(1, args.accessories)
+    response = await recorder.call(client, "buy", "POST", f"/api/accessories/user/{uid}/buy/{accessory_id}")
+    if response is None:
+        return
+    await recorder.call(client, "equip", "PATCH", f"/api/accessories/{response.json()['id']}/equip")
+
+
+async def mixed(client, recorder, rng, args):
+    flow = rng.choices((classify_health, shop_open, buy_equip), weights=(70, 25, 5))[0]
+    await flow(client, recorder, rng, args)
+
+
+SCENARIOS = {
+    "classify_health": classify_health,
+    "shop_open": shop_open,
+    "buy_equip": buy_equip,
+    "mixed": mixed,
+}
+
+
+async def run_scenario(url, flow, args):
+    recorder = Recorder()
+    async with httpx.AsyncClient(
+        base_url=url,
+        limits=httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency),
+        timeout=60.0,
+    ) as client:
+        deadline = time.perf_counter() + args.duration
+
+        async def virtual_user(index):
+            rng = random.Random(args.seed * 100003 + index)
+            while time.perf_counter() < deadline:
+                await flow(client, recorder, rng, args)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(virtual_user(index) for index in range(args.concurrency)))
+        return recorder.report(time.perf_counter() - started)
+
+
+def seed(args):
+    engine = get_sync_db_engine()
+    with engine.connect() as connection:
+        connection.exec_driver_sql(f"DROP SCHEMA IF EXISTS {SCRATCH_SCHEMA} CASCADE")
+        connection.exec_driver_sql(f"CREATE SCHEMA {SCRATCH_SCHEMA}")
+        connection.exec_driver_sql(f"SET search_path TO {SCRATCH_SCHEMA}")
+        connection.exec_driver_sql((SCHEMA_DIR / "schema.sql").read_text(), execution_options=VERBATIM)
+        connection.exec_driver_sql(
+            SEED_SQL.format(users=args.users, accessories=args.accessories, owned=args.owned),
+            execution_options=VERBATIM,
+        )
+        connection.commit()
+    engine.dispose()
+
+
+def drop_scratch_schema():
+    engine = get_sync_db_engine()
+    with engine.begin() as connection:
+        connection.exec_driver_sql(f"DROP SCHEMA IF EXISTS {SCRATCH_SCHEMA} CASCADE")
+    engine.dispose()
+
+
+async def wait_until_ready(url, timeout=60.0):
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient(base_url=url, timeout=2.0) as client:
+        while time.perf_counter() < deadline:
+            try:
+                if (await client.get("/readyz")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.25)
+    raise RuntimeError(f"{url} did not become ready within {timeout:g}s")
+
+
+def current_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=backend_dir, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--accessories", type=int, default=40)
+    parser.add_argument("--owned", type=int, default=3, help="accessories seeded per user")
+    parser.add_argument("--distinct-prompts", type=int, default=500, help="bounds how often the cache can answer")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per scenario")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--openai-latency-ms", type=float, default=400)
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--stub-port", type=int, default=9100)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="also write the JSON report here")
+    parser.add_argument("--keep-schema", action="store_true")
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    database_url = make_url(get_database_url()).update_query_dict({"options": f"-csearch_path={SCRATCH_SCHEMA}"})
+    env = {
+        **os.environ,
+        "DB_CONNECTION": database_url.render_as_string(hide_password=False),
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{args.stub_port}/v1",
+        "OPENAI_API_KEY": "stub",
+        "RUN_MIGRATIONS_ON_STARTUP": "false",
+    }
+    url = f"http://127.0.0.1:{args.port}"
+    processes = []
+
+    try:
+        seed(args)
+        processes.append(subprocess.Popen(
+            [sys.executable, str(backend_dir / "bench" / "stub_openai.py"),
+             "--port", str(args.stub_port), "--latency-ms", str(args.openai_latency_ms)],
+            env=env,
+        ))
+        processes.append(subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "src.main:create_app", "--factory",
+             "--port", str(args.port), "--workers", str(args.workers), "--log-level", "warning", "--no-access-log"],
+            cwd=backend_dir,
+            env=env,
+        ))
+        asyncio.run(wait_until_ready(url))
+        results = {name: asyncio.run(run_scenario(url, SCENARIOS[name], args)) for name in scenarios}
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=30)
+        if not args.keep_schema:
+            drop_scratch_schema()
+
+    report = {
+        "commit": current_commit(),
+        "config": {
+            key: getattr(args, key)
+            for key in ("users", "accessories", "owned", "distinct_prompts", "duration", "concurrency", "workers", "openai_latency_ms", "seed")
+        },
+        "scenarios": results,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+-- Server-side classification history, written in batches off the request path.
+-- uid is deliberately not a foreign key: it comes from the client unverified,
+-- and one unknown id must not fail a whole batched insert.
+CREATE TABLE IF NOT EXISTS classifications (
+    id BIGSERIAL PRIMARY KEY,
+    uid INT,
+    platform VARCHAR(50),
+    prompt TEXT NOT NULL,
+    value INT NOT NULL,
+    suggestion TEXT,
+    model VARCHAR(255) NOT NULL,
+    backend VARCHAR(20) NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_classifications_uid_created_at
+    ON classifications (uid, created_at);
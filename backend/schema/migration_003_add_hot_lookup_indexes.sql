@@ -0,0 +1,25 @@
+-- Secondary indexes for the columns the routers filter and join on.
+
+-- Each user has at most one alive anteater. Older data may hold several;
+-- keep the lowest id alive (the one /api/anteaters/user/{uid}/name picks).
+UPDATE anteater
+SET is_dead = TRUE
+WHERE is_dead = FALSE
+  AND id NOT IN (
+      SELECT MIN(id) FROM anteater WHERE is_dead = FALSE GROUP BY uid
+  );
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_anteater_alive_per_user
+    ON anteater (uid) WHERE is_dead = FALSE;
+
+CREATE INDEX IF NOT EXISTS idx_anteater_uid ON anteater (uid);
+
+-- (uid, accessory_id) also serves the shop view's ownership join.
+CREATE INDEX IF NOT EXISTS idx_has_accessory_uid_accessory_id
+    ON has_accessory (uid, accessory_id);
+
+CREATE INDEX IF NOT EXISTS idx_has_accessory_anteater_id ON has_accessory (anteater_id);
+
+CREATE INDEX IF NOT EXISTS idx_has_accessory_accessory_id ON has_accessory (accessory_id);
+
+CREATE INDEX IF NOT EXISTS idx_accessories_type ON accessories (type);
@@ -0,0 +1,14 @@
+-- Tell app instances to reload their in-memory accessory catalog whenever
+-- the accessories table changes.
+CREATE OR REPLACE FUNCTION notify_accessories_changed() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('accessories_changed', TG_OP);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS accessories_changed ON accessories;
+
+CREATE TRIGGER accessories_changed
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON accessories
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_accessories_changed();
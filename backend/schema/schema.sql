@@ -36,4 +36,36 @@ CREATE TABLE has_accessory (
     FOREIGN KEY (uid) REFERENCES users(id) ON DELETE CASCADE,
     FOREIGN KEY (accessory_id) REFERENCES accessories(id),
     FOREIGN KEY (anteater_id) REFERENCES anteater(id) ON DELETE SET NULL
-);
\ No newline at end of file
+);
+
+CREATE UNIQUE INDEX uq_anteater_alive_per_user ON anteater (uid) WHERE is_dead = FALSE;
+CREATE INDEX idx_anteater_uid ON anteater (uid);
+CREATE INDEX idx_has_accessory_uid_accessory_id ON has_accessory (uid, accessory_id);
+CREATE INDEX idx_has_accessory_anteater_id ON has_accessory (anteater_id);
+CREATE INDEX idx_has_accessory_accessory_id ON has_accessory (accessory_id);
+CREATE INDEX idx_accessories_type ON accessories (type);
+
+CREATE FUNCTION notify_accessories_changed() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('accessories_changed', TG_OP);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER accessories_changed
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON accessories
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_accessories_changed();
+
+CREATE TABLE classifications (
+    id BIGSERIAL PRIMARY KEY,
+    uid INT,
+    platform VARCHAR(50),
+    prompt TEXT NOT NULL,
+    value INT NOT NULL,
+    suggestion TEXT,
+    model VARCHAR(255) NOT NULL,
+    backend VARCHAR(20) NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_classifications_uid_created_at ON classifications (uid, created_at);
@@ -1,10 +1,17 @@
-from fastapi import APIRouter, HTTPException, Request, status
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from pydantic import BaseModel
-from sqlalchemy import text
 from sqlalchemy.exc import IntegrityError
 
+from .. import queries
+from ..http_cache import ConditionalGet, cache_headers, catalog_validator
+from ..pagination import MAX_PAGE_SIZE, JsonList, ndjson_response, set_next_cursor, wants_ndjson
+
 router = APIRouter(prefix="/api/accessories", tags=["accessories"])
 
+catalog_cache = ConditionalGet(catalog_validator, max_age=int(os.getenv("CATALOG_MAX_AGE_SECONDS", "60")))
+
 
 class AccessoryCreate(BaseModel):
 	name: str
@@ -49,34 +56,32 @@ class EquipRequest(BaseModel):
 	pass
 
 
-# Get all accessories (shop catalog)
-@router.get("", response_model=list[AccessoryResponse])
-async def list_accessories(request: Request) -> list[AccessoryResponse]:
-	query = text(
-		"""
-		SELECT id, name, price, type, image_url, description
-		FROM accessories
-		ORDER BY id
-		"""
-	)
-	with request.app.state.db_engine.connect() as connection:
-		rows = connection.execute(query).mappings().all()
-	return [AccessoryResponse.model_validate(row) for row in rows]
+accessory_list_json = JsonList(AccessoryResponse)
+user_accessory_list_json = JsonList(UserAccessoryResponse)
+shop_accessory_list_json = JsonList(ShopAccessoryResponse)
+
+
+# Get all accessories (shop catalog), served from the in-memory catalog
+@router.get("", response_model=list[AccessoryResponse], dependencies=[Depends(catalog_cache)])
+async def list_accessories(
+	request: Request,
+	response: Response,
+	after_id: int | None = Query(None, ge=0),
+	limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+	stream: bool = False,
+) -> Response:
+	rows = request.app.state.accessory_catalog.page(after_id, limit)
+	if wants_ndjson(request, stream):
+		return ndjson_response(rows, AccessoryResponse, headers=cache_headers(response))
+
+	set_next_cursor(response, rows, limit)
+	return accessory_list_json.response(rows, response)
 
 
 # Get single accessory
-@router.get("/{accessory_id}", response_model=AccessoryResponse)
+@router.get("/{accessory_id}", response_model=AccessoryResponse, dependencies=[Depends(catalog_cache)])
 async def get_accessory(accessory_id: int, request: Request) -> AccessoryResponse:
-	query = text(
-		"""
-		SELECT id, name, price, type, image_url, description
-		FROM accessories
-		WHERE id = :accessory_id
-		"""
-	)
-	with request.app.state.db_engine.connect() as connection:
-		row = connection.execute(query, {"accessory_id": accessory_id}).mappings().first()
-
+	row = request.app.state.accessory_catalog.get(accessory_id)
 	if row is None:
 		raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Accessory not found")
 
@@ -94,8 +99,8 @@ async def get_accessory(accessory_id: int, request: Request) -> AccessoryRespons
 # 		"""
 # 	)
 # 	try:
-# 		with request.app.state.db_engine.begin() as connection:
-# 			row = connection.execute(
+# 		async with request.app.state.db_engine.begin() as connection:
+# 			row = (await connection.execute(
 # 				query,
 # 				{
 # 					"name": payload.name,
@@ -103,7 +108,7 @@ async def get_accessory(accessory_id: int, request: Request) -> AccessoryRespons
 # 					"image_url": payload.image_url,
 # 					"description": payload.description,
 # 				},
-# 			).mappings().one()
+# 			)).mappings().one()
 # 	except IntegrityError as exc:
 # 		raise HTTPException(
 # 			status_code=status.HTTP_400_BAD_REQUEST,
@@ -115,126 +120,58 @@ async def get_accessory(accessory_id: int, request: Request) -> AccessoryRespons
 
 # Get user's inventory
 @router.get("/user/{uid}/inventory", response_model=list[UserAccessoryResponse])
-async def get_user_inventory(uid: int, request: Request) -> list[UserAccessoryResponse]:
-	query = text(
-		"""
-		SELECT ha.id, ha.uid, ha.accessory_id, ha.anteater_id,
-		       a.name, a.price, a.type, a.image_url, a.description
-		FROM has_accessory ha
-		JOIN accessories a ON ha.accessory_id = a.id
-		WHERE ha.uid = :uid
-		ORDER BY ha.id DESC
-		"""
-	)
-	with request.app.state.db_engine.connect() as connection:
-		rows = connection.execute(query, {"uid": uid}).mappings().all()
-	return [UserAccessoryResponse.model_validate(row) for row in rows]
+async def get_user_inventory(uid: int, request: Request) -> Response:
+	async with request.app.state.db_engine.connect() as connection:
+		owned = (await connection.execute(queries.OWNED_ACCESSORIES, {"uid": uid})).mappings().all()
+	rows = request.app.state.accessory_catalog.with_details(owned)
+	return user_accessory_list_json.response(rows)
 
 
 # Buy accessory
 @router.post("/user/{uid}/buy/{accessory_id}", response_model=UserAccessoryResponse)
 async def buy_accessory(uid: int, accessory_id: int, request: Request) -> UserAccessoryResponse:
-	# Get user's current ants and accessory price
-	fetch_query = text(
-		"""
-		SELECT users.ants as current_ants
-		FROM users
-		WHERE users.id = :uid
-		"""
-	)
-
-	with request.app.state.db_engine.connect() as connection:
-		user = connection.execute(fetch_query, {"uid": uid}).mappings().first()
-
-	if user is None:
-		raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-
-	# Get accessory price
-	accessory_query = text(
-		"""
-		SELECT price FROM accessories WHERE id = :accessory_id
-		"""
-	)
-	with request.app.state.db_engine.connect() as connection:
-		accessory = connection.execute(accessory_query, {"accessory_id": accessory_id}).mappings().first()
-
+	catalog = request.app.state.accessory_catalog
+	accessory = catalog.get(accessory_id)
 	if accessory is None:
 		raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Accessory not found")
 
-	price = accessory["price"]
-	current_ants = user["current_ants"]
+	# The price comes from the catalog, so the statement only touches users
+	# and has_accessory. The conditional UPDATE is re-checked against the
+	# latest row under its lock, so two simultaneous buys cannot both spend
+	# the same ants. user_found tells the failure cases apart when no
+	# purchase row comes back.
+	try:
+		async with request.app.state.events.transaction() as connection:
+			result = (await connection.execute(
+				queries.BUY_ACCESSORY,
+				{"uid": uid, "accessory_id": accessory_id, "price": accessory["price"]},
+			)).mappings().one()
+			if result["id"] is not None:
+				await request.app.state.events.publish(connection, uid, "ants", {"ants": result["ants"]})
+	except IntegrityError as exc:
+		# Deleted after the catalog was last loaded
+		raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Accessory not found") from exc
+
+	if not result["user_found"]:
+		raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
-	if current_ants < price:
+	if result["id"] is None:
 		raise HTTPException(
 			status_code=status.HTTP_400_BAD_REQUEST,
 			detail="Insufficient ants to purchase this accessory",
 		)
 
-	# Deduct ants and create has_accessory record
-	update_ants_query = text(
-		"""
-		UPDATE users
-		SET ants = ants - :price
-		WHERE id = :uid
-		"""
-	)
-
-	insert_accessory_query = text(
-		"""
-		INSERT INTO has_accessory (uid, accessory_id)
-		VALUES (:uid, :accessory_id)
-		RETURNING id, uid, accessory_id, anteater_id
-		"""
-	)
-
-	get_accessory_details = text(
-		"""
-		SELECT ha.id, ha.uid, ha.accessory_id, ha.anteater_id,
-		       a.name, a.price, a.type, a.image_url, a.description
-		FROM has_accessory ha
-		JOIN accessories a ON ha.accessory_id = a.id
-		WHERE ha.id = :id
-		"""
-	)
-
-	with request.app.state.db_engine.begin() as connection:
-		# Deduct ants
-		connection.execute(
-			update_ants_query,
-			{"uid": uid, "price": price},
-		)
-
-		# Create purchase record
-		purchase = connection.execute(
-			insert_accessory_query,
-			{"uid": uid, "accessory_id": accessory_id},
-		).mappings().first()
-
-		# Get full details
-		result = connection.execute(
-			get_accessory_details,
-			{"id": purchase["id"]},
-		).mappings().first()
-
-	return UserAccessoryResponse.model_validate(result)
+	return UserAccessoryResponse.model_validate({**accessory, **result})
 
 
 # Get all accessories for shop with ownership status
 @router.get("/user/{uid}/shop", response_model=list[ShopAccessoryResponse])
-async def get_shop_view(uid: int, request: Request) -> list[ShopAccessoryResponse]:
-	query = text(
-		"""
-		SELECT a.id, a.name, a.price, a.type, a.image_url, a.description,
-		       CASE WHEN ha.id IS NOT NULL THEN TRUE ELSE FALSE END as owned,
-		       ha.id as user_accessory_id
-		FROM accessories a
-		LEFT JOIN has_accessory ha ON a.id = ha.accessory_id AND ha.uid = :uid
-		ORDER BY a.id
-		"""
-	)
-	with request.app.state.db_engine.connect() as connection:
-		rows = connection.execute(query, {"uid": uid}).mappings().all()
-	return [ShopAccessoryResponse.model_validate(row) for row in rows]
+async def get_shop_view(uid: int, request: Request) -> Response:
+	# Only ownership comes from the database; the catalog side is cached.
+	async with request.app.state.db_engine.connect() as connection:
+		owned = (await connection.execute(queries.OWNED_ACCESSORY_IDS, {"uid": uid})).mappings().all()
+	rows = request.app.state.accessory_catalog.shop_view(owned)
+	return shop_accessory_list_json.response(rows)
 
 
 # Equip accessory to anteater
@@ -244,16 +181,8 @@ async def equip_accessory(
 	request: Request,
 ) -> UserAccessoryResponse:
 	# Verify user_accessory exists and get uid + type
-	verify_query = text(
-		"""
-		SELECT ha.uid, a.type
-		FROM has_accessory ha
-		JOIN accessories a ON ha.accessory_id = a.id
-		WHERE ha.id = :id
-		"""
-	)
-	with request.app.state.db_engine.connect() as connection:
-		user_acc = connection.execute(verify_query, {"id": user_accessory_id}).mappings().first()
+	async with request.app.state.db_engine.connect() as connection:
+		user_acc = (await connection.execute(queries.USER_ACCESSORY_TYPE, {"id": user_accessory_id})).mappings().first()
 
 	if user_acc is None:
 		raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User accessory not found")
@@ -262,109 +191,55 @@ async def equip_accessory(
 	accessory_type = user_acc["type"]
 
 	# Find alive anteater for this user
-	find_anteater = text(
-		"""
-		SELECT id FROM anteater WHERE uid = :uid AND is_dead = FALSE
-		"""
-	)
-	with request.app.state.db_engine.connect() as connection:
-		anteater = connection.execute(find_anteater, {"uid": uid}).mappings().first()
+	async with request.app.state.db_engine.connect() as connection:
+		anteater = (await connection.execute(queries.ALIVE_ANTEATER_ID, {"uid": uid})).mappings().first()
 
 	if anteater is None:
 		raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User has no alive anteater")
 
 	anteater_id = anteater["id"]
 
-	# Unequip any existing accessory of the same type on this anteater
-	unequip_same_type = text(
-		"""
-		UPDATE has_accessory
-		SET anteater_id = NULL
-		WHERE anteater_id = :anteater_id
-		AND uid = :uid
-		AND accessory_id IN (
-			SELECT id FROM accessories WHERE type = :type
-		)
-		"""
-	)
-
-	# Equip the new accessory
-	update_query = text(
-		"""
-		UPDATE has_accessory
-		SET anteater_id = :anteater_id
-		WHERE id = :id
-		"""
-	)
-
-	get_details = text(
-		"""
-		SELECT ha.id, ha.uid, ha.accessory_id, ha.anteater_id,
-		       a.name, a.price, a.type, a.image_url, a.description
-		FROM has_accessory ha
-		JOIN accessories a ON ha.accessory_id = a.id
-		WHERE ha.id = :id
-		"""
-	)
-
-	with request.app.state.db_engine.begin() as connection:
+	async with request.app.state.events.transaction() as connection:
 		# Unequip same type
-		connection.execute(
-			unequip_same_type,
+		await connection.execute(
+			queries.UNEQUIP_SAME_TYPE,
 			{"anteater_id": anteater_id, "uid": uid, "type": accessory_type},
 		)
 		# Equip new one
-		connection.execute(
-			update_query,
+		await connection.execute(
+			queries.EQUIP_USER_ACCESSORY,
 			{"id": user_accessory_id, "anteater_id": anteater_id},
 		)
-		result = connection.execute(get_details, {"id": user_accessory_id}).mappings().first()
+		result = (await connection.execute(queries.USER_ACCESSORY_DETAIL, {"id": user_accessory_id})).mappings().first()
+		equipped = UserAccessoryResponse.model_validate(result)
+		await request.app.state.events.publish(connection, uid, "equip", {**equipped.model_dump(), "equipped": True})
 
-	return UserAccessoryResponse.model_validate(result)
+	return equipped
 
 
 # Unequip accessory
 @router.patch("/{user_accessory_id}/unequip", response_model=UserAccessoryResponse)
 async def unequip_accessory(user_accessory_id: int, request: Request) -> UserAccessoryResponse:
-	update_query = text(
-		"""
-		UPDATE has_accessory
-		SET anteater_id = NULL
-		WHERE id = :id
-		"""
-	)
-
-	get_details = text(
-		"""
-		SELECT ha.id, ha.uid, ha.accessory_id, ha.anteater_id,
-		       a.name, a.price, a.type, a.image_url, a.description
-		FROM has_accessory ha
-		JOIN accessories a ON ha.accessory_id = a.id
-		WHERE ha.id = :id
-		"""
-	)
-
-	with request.app.state.db_engine.begin() as connection:
-		connection.execute(update_query, {"id": user_accessory_id})
-		result = connection.execute(get_details, {"id": user_accessory_id}).mappings().first()
-
-	if result is None:
-		raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User accessory not found")
+	async with request.app.state.events.transaction() as connection:
+		await connection.execute(queries.UNEQUIP_USER_ACCESSORY, {"id": user_accessory_id})
+		result = (await connection.execute(queries.USER_ACCESSORY_DETAIL, {"id": user_accessory_id})).mappings().first()
+		if result is None:
+			raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User accessory not found")
+
+		unequipped = UserAccessoryResponse.model_validate(result)
+		await request.app.state.events.publish(
+			connection, unequipped.uid, "equip", {**unequipped.model_dump(), "equipped": False}
+		)
 
-	return UserAccessoryResponse.model_validate(result)
+	return unequipped
 
 
 # Get anteater's equipped accessories
 @router.get("/user/{uid}/equipped", response_model=list[UserAccessoryResponse])
-async def get_anteater_accessories(uid: int, request: Request) -> list[UserAccessoryResponse]:
+async def get_anteater_accessories(uid: int, request: Request) -> Response:
 	# Find alive anteater for this user
-	find_anteater = text(
-		"""
-		SELECT id FROM anteater WHERE uid = :uid AND is_dead = FALSE
-		"""
-	)
-	with request.app.state.db_engine.connect() as connection:
-		anteater = connection.execute(find_anteater, {"uid": uid}).mappings().first()
+	async with request.app.state.db_engine.connect() as connection:
+		anteater = (await connection.execute(queries.ALIVE_ANTEATER_ID, {"uid": uid})).mappings().first()
 
 	if anteater is None:
 		raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User has no alive anteater")
@@ -372,35 +247,16 @@ async def get_anteater_accessories(uid: int, request: Request) -> list[UserAcces
 	anteater_id = anteater["id"]
 
 	# Get equipped accessories for this anteater
-	query = text(
-		"""
-		SELECT ha.id, ha.uid, ha.accessory_id, ha.anteater_id,
-		       a.name, a.price, a.type, a.image_url, a.description
-		FROM has_accessory ha
-		JOIN accessories a ON ha.accessory_id = a.id
-		WHERE ha.anteater_id = :anteater_id
-		ORDER BY ha.id
-		"""
-	)
-	with request.app.state.db_engine.connect() as connection:
-		rows = connection.execute(query, {"anteater_id": anteater_id}).mappings().all()
-	return [UserAccessoryResponse.model_validate(row) for row in rows]
+	async with request.app.state.db_engine.connect() as connection:
+		rows = (await connection.execute(queries.EQUIPPED_ACCESSORIES, {"anteater_id": anteater_id})).mappings().all()
+	return user_accessory_list_json.response(rows)
 
 #flag
 # Get specific user accessory
 @router.get("/user-accessories/{id}", response_model=UserAccessoryResponse)
 async def get_user_accessory(id: int, request: Request) -> UserAccessoryResponse:
-	query = text(
-		"""
-		SELECT ha.id, ha.uid, ha.accessory_id, ha.anteater_id,
-		       a.name, a.price, a.type, a.image_url, a.description
-		FROM has_accessory ha
-		JOIN accessories a ON ha.accessory_id = a.id
-		WHERE ha.id = :id
-		"""
-	)
-	with request.app.state.db_engine.connect() as connection:
-		row = connection.execute(query, {"id": id}).mappings().first()
+	async with request.app.state.db_engine.connect() as connection:
+		row = (await connection.execute(queries.USER_ACCESSORY_DETAIL, {"id": id})).mappings().first()
 
 	if row is None:
 		raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User accessory not found")
@@ -411,22 +267,15 @@ async def get_user_accessory(id: int, request: Request) -> UserAccessoryResponse
 # Clear all user accessories (dev/testing)
 @router.post("/user/{uid}/clear-inventory", status_code=status.HTTP_204_NO_CONTENT)
 async def clear_user_inventory(uid: int, request: Request) -> None:
-	query = text("DELETE FROM has_accessory WHERE uid = :uid")
-	with request.app.state.db_engine.begin() as connection:
-		connection.execute(query, {"uid": uid})
+	async with request.app.state.db_engine.begin() as connection:
+		await connection.execute(queries.CLEAR_INVENTORY, {"uid": uid})
 
 
 # Delete/sell user accessory
 @router.delete("/user-accessories/{id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_user_accessory(id: int, request: Request) -> None:
-	query = text(
-		"""
-		DELETE FROM has_accessory
-		WHERE id = :id
-		"""
-	)
-	with request.app.state.db_engine.begin() as connection:
-		result = connection.execute(query, {"id": id})
+	async with request.app.state.db_engine.begin() as connection:
+		result = await connection.execute(queries.DELETE_USER_ACCESSORY, {"id": id})
 
 	if result.rowcount == 0:
 		raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User accessory not found")
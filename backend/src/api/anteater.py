@@ -1,15 +1,21 @@
 from typing import Annotated
 
-from fastapi import APIRouter, HTTPException, Request, status
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
 from pydantic import BaseModel, ConfigDict, Field
-from sqlalchemy import text
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from .. import queries
+from ..pagination import MAX_PAGE_SIZE, JsonList, keyset_params, set_next_cursor, stream_ndjson, wants_ndjson
+from .accessory import UserAccessoryResponse
 
 router = APIRouter(prefix="/api/anteaters", tags=["anteaters"])
 
 ALLOWED_HEALTH_INCREMENTS = {-3, -2, -1, 0, 1, 2}
 MIN_HEALTH = 0
+MAX_HEALTH = 100
 ANT_HEALTH_MULTIPLIER = 12
+MAX_HEALTH_DELTAS_PER_BATCH = 100
 
 IsDeadAlias = Annotated[
 	bool,
@@ -47,48 +53,64 @@ class AnteaterHealthResponse(BaseModel):
 	model_config = ConfigDict(populate_by_name=True)
 
 
+class AnteaterDetailResponse(BaseModel):
+	id: int
+	name: str
+	health: int
+	is_dead: IsDeadAlias
+	uid: int
+	ants: int
+	accessories: list[UserAccessoryResponse] | None = None
+
+	model_config = ConfigDict(populate_by_name=True)
+
+
 class AnteaterHealthDelta(BaseModel):
 	delta: int
 
 
+class AnteaterHealthDeltaBatch(BaseModel):
+	deltas: list[int] = Field(min_length=1, max_length=MAX_HEALTH_DELTAS_PER_BATCH)
+
+
 class AnteaterNameUpdate(BaseModel):
 	name: str
 
 
+anteater_list_json = JsonList(AnteaterResponse)
+
+
 @router.get("", response_model=list[AnteaterResponse])
-async def list_anteaters(request: Request) -> list[AnteaterResponse]:
-	query = text(
-		"""
-		SELECT id, name, health, is_dead, uid
-		FROM anteater
-		ORDER BY id
-		"""
-	)
-	with request.app.state.db_engine.connect() as connection:
-		rows = connection.execute(query).mappings().all()
-	return [AnteaterResponse.model_validate(row) for row in rows]
+async def list_anteaters(
+	request: Request,
+	response: Response,
+	after_id: int | None = Query(None, ge=0),
+	limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+	stream: bool = False,
+) -> Response:
+	params = keyset_params(after_id, limit)
+	if wants_ndjson(request, stream):
+		return stream_ndjson(request.app.state.db_engine, queries.ANTEATER_PAGE, params, AnteaterResponse)
+
+	async with request.app.state.db_engine.connect() as connection:
+		rows = (await connection.execute(queries.ANTEATER_PAGE, params)).mappings().all()
+	set_next_cursor(response, rows, limit)
+	return anteater_list_json.response(rows, response)
 
 
 @router.post("", response_model=AnteaterResponse, status_code=status.HTTP_201_CREATED)
 async def create_anteater(payload: AnteaterCreate, request: Request) -> AnteaterResponse:
-	query = text(
-		"""
-		INSERT INTO anteater (name, health, is_dead, uid)
-		VALUES (:name, :health, :is_dead, :uid)
-		RETURNING id, name, health, is_dead, uid
-		"""
-	)
 	try:
-		with request.app.state.db_engine.begin() as connection:
-			row = connection.execute(
-				query,
+		async with request.app.state.db_engine.begin() as connection:
+			row = (await connection.execute(
+				queries.INSERT_ANTEATER,
 				{
 					"name": payload.name,
 					"health": payload.health,
 					"is_dead": payload.is_dead,
 					"uid": payload.uid,
 				},
-			).mappings().one()
+			)).mappings().one()
 	except IntegrityError as exc:
 		raise HTTPException(
 			status_code=status.HTTP_400_BAD_REQUEST,
@@ -98,30 +120,39 @@ async def create_anteater(payload: AnteaterCreate, request: Request) -> Anteater
 	return AnteaterResponse.model_validate(row)
 
 
+@router.get("/user/{uid}", response_model=AnteaterDetailResponse)
+async def get_user_anteater(
+	uid: int,
+	request: Request,
+	include_accessories: bool = False,
+) -> AnteaterDetailResponse:
+	# Alive anteater (unique per user) with the owner's ants and, on request,
+	# its equipped accessories aggregated into the same row.
+	async with request.app.state.db_engine.connect() as connection:
+		row = (await connection.execute(
+			queries.ALIVE_ANTEATER_WITH_ACCESSORIES,
+			{"uid": uid, "include_accessories": include_accessories},
+		)).mappings().first()
+
+	if row is None:
+		raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No alive anteater found for this user")
+
+	return AnteaterDetailResponse.model_validate(row)
+
+
 @router.get("/{anteater_id}", response_model=AnteaterResponse)
 async def get_anteater(anteater_id: int, request: Request) -> AnteaterResponse:
-	query = text(
-		"""
-		SELECT id, name, health, is_dead, uid
-		FROM anteater
-		WHERE id = :anteater_id
-		"""
-	)
-	with request.app.state.db_engine.connect() as connection:
-		row = connection.execute(query, {"anteater_id": anteater_id}).mappings().first()
+	async with request.app.state.db_engine.connect() as connection:
+		row = (await connection.execute(queries.ANTEATER_BY_ID, {"anteater_id": anteater_id})).mappings().first()
 
 	if row is None:
 		raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Anteater not found")
 
 	return AnteaterResponse.model_validate(row)
 
-@router.patch("/{anteater_id}/health", response_model=AnteaterHealthResponse)
-async def update_anteater_health(
-	anteater_id: int,
-	payload: AnteaterHealthDelta,
-	request: Request,
-) -> AnteaterHealthResponse:
-	if payload.delta not in ALLOWED_HEALTH_INCREMENTS:
+async def _apply_health_deltas(request: Request, anteater_id: int, deltas: list[int]) -> AnteaterHealthResponse:
+	invalid = [delta for delta in deltas if delta not in ALLOWED_HEALTH_INCREMENTS]
+	if invalid:
 		raise HTTPException(
 			status_code=status.HTTP_400_BAD_REQUEST,
 			detail=(
@@ -129,111 +160,59 @@ async def update_anteater_health(
 			),
 		)
 
-	# Get current anteater and user's ant count
-	fetch_query = text(
-		"""
-		SELECT a.id, a.name, a.health, a.is_dead, a.uid,
-		       u.ants as total_ants
-		FROM anteater a
-		JOIN users u ON u.id = a.uid
-		WHERE a.id = :anteater_id
-		"""
-	)
-
-	with request.app.state.db_engine.connect() as connection:
-		current = connection.execute(fetch_query, {"anteater_id": anteater_id}).mappings().first()
+	async with request.app.state.events.transaction() as connection:
+		row = (await connection.execute(
+			queries.APPLY_HEALTH_DELTAS,
+			{
+				"anteater_id": anteater_id,
+				# All health changes are scaled by multiplier
+				"scaled_deltas": [delta * ANT_HEALTH_MULTIPLIER for delta in deltas],
+				"min_health": MIN_HEALTH,
+				"max_health": MAX_HEALTH,
+			},
+		)).mappings().first()
+		if row is None:
+			raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Anteater not found")
 
-	if current is None:
-		raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Anteater not found")
+		result = AnteaterHealthResponse.model_validate(row)
+		await publish_anteater_state(request, connection, result)
 
-	uid = current["uid"]
-	current_health = current["health"]
-	total_ants = current["total_ants"]
-
-	# All health changes are scaled by multiplier
-	scaled_delta = payload.delta * ANT_HEALTH_MULTIPLIER
-
-	# Calculate damage/healing flow
-	if scaled_delta < 0:
-		# DAMAGE: ants absorb first, then health takes remainder
-		damage = abs(scaled_delta)
-		ants_absorbed = min(damage, total_ants)
-		remaining_damage = damage - ants_absorbed
-		
-		new_health = max(MIN_HEALTH, current_health - remaining_damage)
-		ant_delta = -ants_absorbed
-	else:
-		# HEALING: apply to health, overflow becomes ants
-		new_health = current_health + scaled_delta
-		excess_ants = max(0, new_health - 100)
-		new_health = min(new_health, 100)
-		ant_delta = excess_ants
-
-	# Update queries
-	update_anteater_query = text(
-		"""
-		UPDATE anteater
-		SET
-			health = :new_health,
-			is_dead = (:new_health <= 0)
-		WHERE id = :anteater_id
-		RETURNING id, name, health, is_dead, uid
-		"""
-	)
+	return result
 
-	fetch_with_ants_query = text(
-		"""
-		SELECT a.id, a.name, a.health, a.is_dead, a.uid, u.ants
-		FROM anteater a
-		JOIN users u ON u.id = a.uid
-		WHERE a.id = :anteater_id
-		"""
-	)
 
-	update_ants_query = text(
-		"""
-		UPDATE users
-		SET ants = GREATEST(0, ants + :ant_delta)
-		WHERE id = :uid
-		"""
+async def publish_anteater_state(request: Request, connection: AsyncConnection, result: AnteaterHealthResponse) -> None:
+	"""Push the anteater state to the owner's event stream when the transaction commits."""
+	await request.app.state.events.publish(
+		connection,
+		result.uid,
+		"death" if result.is_dead else "health",
+		result.model_dump(by_alias=True),
 	)
 
-	with request.app.state.db_engine.begin() as connection:
-		# Update anteater health
-		connection.execute(
-			update_anteater_query,
-			{
-				"anteater_id": anteater_id,
-				"new_health": new_health,
-			},
-		)
 
-		# Update ant count if needed
-		if ant_delta != 0:
-			connection.execute(
-				update_ants_query,
-				{"uid": uid, "ant_delta": ant_delta},
-			)
+@router.patch("/{anteater_id}/health", response_model=AnteaterHealthResponse)
+async def update_anteater_health(
+	anteater_id: int,
+	payload: AnteaterHealthDelta,
+	request: Request,
+) -> AnteaterHealthResponse:
+	return await _apply_health_deltas(request, anteater_id, [payload.delta])
 
-		# Fetch updated state with ants
-		row = connection.execute(
-			fetch_with_ants_query,
-			{"anteater_id": anteater_id},
-		).mappings().first()
 
-	return AnteaterHealthResponse.model_validate(row)
+# Apply a burst of deltas (e.g. several classifications in quick
+# succession) in order, in one transaction
+@router.patch("/{anteater_id}/health/batch", response_model=AnteaterHealthResponse)
+async def update_anteater_health_batch(
+	anteater_id: int,
+	payload: AnteaterHealthDeltaBatch,
+	request: Request,
+) -> AnteaterHealthResponse:
+	return await _apply_health_deltas(request, anteater_id, payload.deltas)
 
 @router.patch("/{anteater_id}/dead", response_model=AnteaterHealthResponse)
 async def dead_anteater(anteater_id: int, request: Request) -> AnteaterHealthResponse:
-	check_query = text(
-		"""
-		SELECT id, name, health, is_dead, uid
-		FROM anteater
-		WHERE id = :anteater_id
-		"""
-	)
-	with request.app.state.db_engine.connect() as connection:
-		existing = connection.execute(check_query, {"anteater_id": anteater_id}).mappings().first()
+	async with request.app.state.db_engine.connect() as connection:
+		existing = (await connection.execute(queries.ANTEATER_BY_ID, {"anteater_id": anteater_id})).mappings().first()
 
 	if existing is None:
 		raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Anteater not found")
@@ -242,35 +221,19 @@ async def dead_anteater(anteater_id: int, request: Request) -> AnteaterHealthRes
 		raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Anteater is already dead")
 
 	# Update to dead
-	update_query = text(
-		"""
-		UPDATE anteater
-		SET is_dead = TRUE
-		WHERE id = :anteater_id
-		RETURNING id, name, health, is_dead, uid
-		"""
-	)
-
-	fetch_with_ants_query = text(
-		"""
-		SELECT a.id, a.name, a.health, a.is_dead, a.uid, u.ants
-		FROM anteater a
-		JOIN users u ON u.id = a.uid
-		WHERE a.id = :anteater_id
-		"""
-	)
-
-	with request.app.state.db_engine.begin() as connection:
-		connection.execute(
-			update_query,
+	async with request.app.state.events.transaction() as connection:
+		await connection.execute(
+			queries.MARK_ANTEATER_DEAD,
 			{"anteater_id": anteater_id},
 		)
-		row = connection.execute(
-			fetch_with_ants_query,
+		row = (await connection.execute(
+			queries.ANTEATER_WITH_ANTS,
 			{"anteater_id": anteater_id},
-		).mappings().first()
+		)).mappings().first()
+		result = AnteaterHealthResponse.model_validate(row)
+		await publish_anteater_state(request, connection, result)
 
-	return AnteaterHealthResponse.model_validate(row)
+	return result
 
 
 @router.patch("/{anteater_id}/name", response_model=AnteaterResponse)
@@ -279,20 +242,11 @@ async def update_anteater_name(
 	payload: AnteaterNameUpdate,
 	request: Request,
 ) -> AnteaterResponse:
-	update_query = text(
-		"""
-		UPDATE anteater
-		SET name = :name
-		WHERE id = :anteater_id AND is_dead = FALSE
-		RETURNING id, name, health, is_dead, uid
-		"""
-	)
-	
-	with request.app.state.db_engine.begin() as connection:
-		row = connection.execute(
-			update_query,
+	async with request.app.state.db_engine.begin() as connection:
+		row = (await connection.execute(
+			queries.RENAME_ALIVE_ANTEATER,
 			{"anteater_id": anteater_id, "name": payload.name},
-		).mappings().first()
+		)).mappings().first()
 
 	if row is None:
 		raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Anteater not found")
@@ -307,36 +261,17 @@ async def update_anteater_name_by_uid(
 	request: Request,
 ) -> AnteaterResponse:
 	# First, find the anteater for this user (get the first one by ID)
-	find_query = text(
-		"""
-		SELECT id, name, health, is_dead, uid
-		FROM anteater
-		WHERE uid = :uid
-		ORDER BY id ASC
-		LIMIT 1
-		"""
-	)
-
-	with request.app.state.db_engine.connect() as connection:
-		anteater = connection.execute(find_query, {"uid": uid}).mappings().first()
+	async with request.app.state.db_engine.connect() as connection:
+		anteater = (await connection.execute(queries.FIRST_ANTEATER_FOR_USER, {"uid": uid})).mappings().first()
 
 	if anteater is None:
 		raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No anteater found for this user")
 
 	# Now update only that anteater
-	update_query = text(
-		"""
-		UPDATE anteater
-		SET name = :name
-		WHERE id = :anteater_id
-		RETURNING id, name, health, is_dead, uid
-		"""
-	)
-
-	with request.app.state.db_engine.begin() as connection:
-		row = connection.execute(
-			update_query,
+	async with request.app.state.db_engine.begin() as connection:
+		row = (await connection.execute(
+			queries.RENAME_ANTEATER,
 			{"anteater_id": anteater["id"], "name": payload.name},
-		).mappings().first()
+		)).mappings().first()
 
 	return AnteaterResponse.model_validate(row)
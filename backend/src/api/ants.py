@@ -1,6 +1,8 @@
 from fastapi import APIRouter, HTTPException, Request, status
 from pydantic import BaseModel
-from sqlalchemy import text
+
+from .. import queries
+from .anteater import AnteaterHealthResponse, publish_anteater_state
 
 router = APIRouter(prefix="/api/ants", tags=["ants"])
 
@@ -29,15 +31,8 @@ class UserAntsResponse(BaseModel):
 # Get user's ant count
 @router.get("/user/{uid}")
 async def get_user_ants(uid: int, request: Request) -> dict:
-	query = text(
-		"""
-		SELECT id, name, email, ants
-		FROM users
-		WHERE id = :uid
-		"""
-	)
-	with request.app.state.db_engine.connect() as connection:
-		row = connection.execute(query, {"uid": uid}).mappings().first()
+	async with request.app.state.db_engine.connect() as connection:
+		row = (await connection.execute(queries.USER_ANTS, {"uid": uid})).mappings().first()
 
 	if row is None:
 		raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
@@ -60,20 +55,8 @@ async def update_user_ants(uid: int, payload: AntsDelta, request: Request) -> Us
 		)
 
 	# Get current state
-	fetch_query = text(
-		"""
-		SELECT users.id, users.name, users.email, users.ants as current_ants,
-		       COALESCE(anteater.health, 0) as current_health,
-		       anteater.id as anteater_id,
-		       anteater.name as anteater_name
-		FROM users
-		LEFT JOIN anteater ON anteater.uid = users.id AND anteater.is_dead = FALSE
-		WHERE users.id = :uid
-		"""
-	)
-
-	with request.app.state.db_engine.connect() as connection:
-		current = connection.execute(fetch_query, {"uid": uid}).mappings().first()
+	async with request.app.state.db_engine.connect() as connection:
+		current = (await connection.execute(queries.USER_WITH_ALIVE_ANTEATER, {"uid": uid})).mappings().first()
 
 	if current is None:
 		raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
@@ -109,49 +92,43 @@ async def update_user_ants(uid: int, payload: AntsDelta, request: Request) -> Us
 			ant_final = 0
 			health_final = max(0, current_health - remaining_damage)
 
-	# Update queries
-	update_ants_query = text(
-		"""
-		UPDATE users
-		SET ants = :count
-		WHERE id = :uid
-		"""
-	)
-
-	update_anteater_query = text(
-		"""
-		UPDATE anteater
-		SET health = :health,
-		    is_dead = (:health <= 0)
-		WHERE uid = :uid AND is_dead = FALSE
-		RETURNING id
-		"""
-	)
-
-	with request.app.state.db_engine.begin() as connection:
+	async with request.app.state.events.transaction() as connection:
 		# Update ant count
-		connection.execute(
-			update_ants_query,
+		await connection.execute(
+			queries.SET_USER_ANTS,
 			{"uid": uid, "count": int(ant_final)},
 		)
 
-		# Update anteater health if exists
+		# Update anteater health if exists. No row comes back when the
+		# anteater died (or was replaced) after the read above.
+		anteater = None
 		if anteater_id:
-			connection.execute(
-				update_anteater_query,
+			anteater = (await connection.execute(
+				queries.SET_ALIVE_ANTEATER_HEALTH,
 				{"uid": uid, "health": int(health_final)},
+			)).mappings().first()
+
+		# Return updated state
+		result = UserAntsResponse(
+			id=current["id"],
+			name=current["name"],
+			email=current["email"],
+			ants=int(ant_final),
+			health=int(health_final),
+			anteater_name=current["anteater_name"],
+			anteater_id=current["anteater_id"],
+		)
+		await request.app.state.events.publish(connection, uid, "ants", result.model_dump())
+		# The health change (or death) that was actually written reaches
+		# subscribers like the health route's
+		if anteater is not None:
+			await publish_anteater_state(
+				request,
+				connection,
+				AnteaterHealthResponse.model_validate({**anteater, "ants": int(ant_final)}),
 			)
 
-	# Return updated state
-	return UserAntsResponse(
-		id=current["id"],
-		name=current["name"],
-		email=current["email"],
-		ants=int(ant_final),
-		health=int(health_final),
-		anteater_name=current["anteater_name"],
-		anteater_id=current["anteater_id"],
-	)
+	return result
 
 
 # Spend ants on purchase
@@ -163,57 +140,25 @@ async def purchase_ants(uid: int, payload: PurchaseDelta, request: Request) -> U
 			detail="delta must be a positive integer representing the number of ants to purchase",
 		)
 
-	# Get current state
-	fetch_query = text(
-		"""
-		SELECT users.id, users.name, users.email, users.ants as current_ants,
-		       COALESCE(anteater.health, 0) as current_health,
-		       anteater.id as anteater_id,
-		       anteater.name as anteater_name
-		FROM users
-		LEFT JOIN anteater ON anteater.uid = users.id AND anteater.is_dead = FALSE
-		WHERE users.id = :uid
-		"""
-	)
-
-	with request.app.state.db_engine.connect() as connection:
-		current = connection.execute(fetch_query, {"uid": uid}).mappings().first()
-
-	if current is None:
+	# Spend the ants only if the balance covers them and return the updated
+	# state in the same statement; user_found separates a missing user from
+	# an insufficient balance when the UPDATE matches no row.
+	async with request.app.state.events.transaction() as connection:
+		row = (await connection.execute(
+			queries.PURCHASE_ANTS,
+			{"uid": uid, "delta": payload.delta},
+		)).mappings().one()
+		if row["id"] is not None:
+			result = UserAntsResponse.model_validate(row)
+			await request.app.state.events.publish(connection, uid, "ants", result.model_dump())
+
+	if not row["user_found"]:
 		raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
-	current_ants = current["current_ants"]
-	current_health = current["current_health"]
-
-	if current_ants - payload.delta < 0:
+	if row["id"] is None:
 		raise HTTPException(
 			status_code=status.HTTP_400_BAD_REQUEST,
 			detail="Insufficient ants for purchase"
 		)
 
-	new_ants = current_ants - payload.delta
-
-	# Update query
-	update_ants_query = text(
-		"""
-		UPDATE users
-		SET ants = :count
-		WHERE id = :uid
-		"""
-	)
-
-	with request.app.state.db_engine.begin() as connection:
-		connection.execute(
-			update_ants_query,
-			{"uid": uid, "count": new_ants},
-		)
-
-	return UserAntsResponse(
-		id=current["id"],
-		name=current["name"],
-		email=current["email"],
-		ants=new_ants,
-		health=int(current_health),
-		anteater_name=current["anteater_name"],
-		anteater_id=current["anteater_id"],
-	)
\ No newline at end of file
+	return result
\ No newline at end of file
@@ -1,26 +1,81 @@
 """
-Prompt classification API using fine-tuned OpenAI model.
+Prompt classification API using fine-tuned OpenAI model, optionally fronted
+by a local CPU model (see CLASSIFIER_BACKEND).
 """
+import asyncio
+import json
+import logging
 import os
+import re
+import time
+import traceback
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
 from pathlib import Path
 from dotenv import load_dotenv
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from openai import OpenAI
-from typing import Optional
+import httpx
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+from typing import Optional, Protocol
+
+from ..classification_cache import (
+    CachedClassification,
+    ClassificationCache,
+    classification_cache_key,
+)
+from ..classification_stream import ClassificationStreamParser
+from ..events import SSE_HEADERS, SSE_MEDIA_TYPE, format_sse
+from ..local_classifier import LocalClassifier
+from ..metrics import observe_completion, register_stats
+from ..single_flight import SingleFlight
 
 # Load .env file before initializing OpenAI client
 _ENV_PATH = Path(__file__).resolve().parents[2] / ".env"
 load_dotenv(_ENV_PATH)
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/api/classify", tags=["classifier"])
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+# Upstream call limits. The SDK retries connection errors, 408/409/429 and
+# 5xx responses with exponential backoff up to OPENAI_MAX_RETRIES times.
+OPENAI_TIMEOUT_SECONDS = float(os.environ.get("OPENAI_TIMEOUT_SECONDS", "30"))
+OPENAI_MAX_RETRIES = int(os.environ.get("OPENAI_MAX_RETRIES", "2"))
+OPENAI_MAX_CONNECTIONS = int(os.environ.get("OPENAI_MAX_CONNECTIONS", "64"))
+CLASSIFY_MAX_CONCURRENCY = int(os.environ.get("CLASSIFY_MAX_CONCURRENCY", "32"))
+CLASSIFY_BATCH_MAX_PROMPTS = int(os.environ.get("CLASSIFY_BATCH_MAX_PROMPTS", "100"))
+CLASSIFY_BATCH_CONCURRENCY = int(os.environ.get("CLASSIFY_BATCH_CONCURRENCY", "8"))
+
+# Which classifier answers prompts: "remote" (fine-tuned model only),
+# "local" (CPU model only) or "cascade" (local first, escalating prompts
+# whose local confidence is below CLASSIFIER_LOCAL_THRESHOLD).
+CLASSIFIER_BACKEND = os.environ.get("CLASSIFIER_BACKEND", "remote")
+CLASSIFIER_LOCAL_THRESHOLD = float(os.environ.get("CLASSIFIER_LOCAL_THRESHOLD", "0.6"))
+
+# Initialize OpenAI client. The async client shares one pooled keep-alive
+# HTTP connection pool across requests, so the event loop stays free while
+# a completion is in flight.
+client = AsyncOpenAI(
+    api_key=os.environ.get("OPENAI_API_KEY"),
+    timeout=OPENAI_TIMEOUT_SECONDS,
+    max_retries=OPENAI_MAX_RETRIES,
+    http_client=DefaultAsyncHttpxClient(
+        limits=httpx.Limits(
+            max_connections=OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=OPENAI_MAX_CONNECTIONS,
+        ),
+    ),
+)
+
+# Caps the completions in flight per worker; excess requests wait here
+# instead of piling onto the upstream rate limit.
+_completion_slots = asyncio.Semaphore(CLASSIFY_MAX_CONCURRENCY)
 
 # Set your fine-tuned model ID here after creating it
 FINE_TUNED_MODEL = os.environ.get(
-    "FINE_TUNED_MODEL_ID", 
+    "FINE_TUNED_MODEL_ID",
     "gpt-4o-mini-2024-07-18"  # Default to base model if not set
 )
 
@@ -33,6 +88,16 @@ SYSTEM_PROMPT = (
     "+2 → Alters LLM behavior to encourage deeper learning (e.g., 'Help me think step by step', 'Ask guiding questions')"
 )
 
+# Completions are deterministic (temperature=0), so repeated prompts are
+# answered from here instead of another remote call.
+classification_cache = ClassificationCache.from_env()
+register_stats("classification_cache", classification_cache.stats)
+
+# Identical prompts classified at the same time (double submits, several
+# tabs) share one backend call, keyed like the cache.
+classification_flights = SingleFlight()
+register_stats("classification_single_flight", classification_flights.stats)
+
 
 class ClassifyRequest(BaseModel):
     prompt: str
@@ -47,84 +112,449 @@ class ClassifyResponse(BaseModel):
     classification_id: Optional[int] = None
 
 
-@router.post("/", response_model=ClassifyResponse)
-async def classify_prompt(request: ClassifyRequest):
-    """
-    Classify a student prompt using the fine-tuned taxonomy model.
-    Returns the classification value (-3 to +2) and an optional suggestion.
-    Note: Results are stored in localStorage on the frontend, not in database.
-    """
-    if not request.prompt or not request.prompt.strip():
-        raise HTTPException(status_code=400, detail="Prompt cannot be empty")
+class ClassifyBatchRequest(BaseModel):
+    prompts: list[str] = Field(min_length=1, max_length=CLASSIFY_BATCH_MAX_PROMPTS)
+    user_id: Optional[int] = None
+    platform: Optional[str] = None
+
+
+class ClassifyBatchItem(BaseModel):
+    value: int | None = None
+    suggestion: str | None = None
+    raw_response: str | None = None
+    classification_id: Optional[int] = None
+    error: str | None = None
+
+
+class ClassifyBatchResponse(BaseModel):
+    results: list[ClassifyBatchItem]
+
+
+async def _complete(prompt: str) -> str:
+    async with _completion_slots:
+        started = time.perf_counter()
+        try:
+            response = await client.chat.completions.create(
+                model=FINE_TUNED_MODEL,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt},
+                ],
+                temperature=0,
+            )
+        except Exception:
+            observe_completion(FINE_TUNED_MODEL, time.perf_counter() - started, "error")
+            raise
+    observe_completion(FINE_TUNED_MODEL, time.perf_counter() - started, "ok", response.usage)
+    return response.choices[0].message.content
+
+
+async def _complete_stream(prompt: str) -> AsyncIterator[str]:
+    """Like _complete, but yields the completion's content deltas as they arrive."""
+    async with _completion_slots:
+        started = time.perf_counter()
+        usage = None
+        try:
+            stream = await client.chat.completions.create(
+                model=FINE_TUNED_MODEL,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt},
+                ],
+                temperature=0,
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+            async with stream:
+                async for chunk in stream:
+                    if chunk.usage is not None:
+                        usage = chunk.usage
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+        except Exception:
+            observe_completion(FINE_TUNED_MODEL, time.perf_counter() - started, "error")
+            raise
+    observe_completion(FINE_TUNED_MODEL, time.perf_counter() - started, "ok", usage)
+
+
+async def check_upstream() -> None:
+    """Cheap authenticated call used by the readiness monitor; raises on failure."""
+    await client.with_options(max_retries=0).models.retrieve(FINE_TUNED_MODEL)
+
+
+async def close_client() -> None:
+    await client.close()
+
+
+def _parse_classification(content: str) -> tuple[int, str | None]:
+    """Extract the taxonomy value and optional suggestion from a completion."""
+    value = None
+    suggestion = None
 
     try:
-        import logging
-        import json
-        import re
-        logger = logging.getLogger(__name__)
-        logger.info(f"Classifying prompt: {request.prompt[:100]}...")
-        
-        response = client.chat.completions.create(
-            model=FINE_TUNED_MODEL,
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": request.prompt},
-            ],
-            temperature=0,
-        )
+        parsed = json.loads(content)
+        # Handle case where model returns just a number vs. full JSON object
+        if isinstance(parsed, dict):
+            value = parsed.get("value", 0)
+            suggestion = parsed.get("suggestion")
+        elif isinstance(parsed, int):
+            # Model returned just the number
+            value = parsed
+        else:
+            logger.error(f"Unexpected parsed type: {type(parsed)}")
+            raise HTTPException(status_code=500, detail=f"Unexpected response format: {content}")
+    except json.JSONDecodeError:
+        # If not JSON, try to extract just the number
+        match = re.search(r'[-+]?\d+', content)
+        if match:
+            value = int(match.group())
+        else:
+            logger.error(f"Could not parse response: {content}")
+            raise HTTPException(status_code=500, detail=f"Could not parse response: {content}")
+
+    return value, suggestion
+
+
+@dataclass(frozen=True)
+class Classification:
+    value: int
+    suggestion: str | None
+    raw_response: str
+    backend: str
+    confidence: float | None = None
+
 
-        content = response.choices[0].message.content
+class ClassifierBackend(Protocol):
+    name: str
+
+    async def warm_up(self) -> None: ...
+
+    async def classify(self, prompt: str) -> Classification: ...
+
+    def stats(self) -> dict: ...
+
+
+class RemoteClassifierBackend:
+    """The fine-tuned OpenAI model."""
+
+    name = "remote"
+
+    async def warm_up(self) -> None:
+        pass
+
+    async def classify(self, prompt: str) -> Classification:
+        content = await _complete(prompt)
         logger.info(f"Got response: {content}")
+        value, suggestion = _parse_classification(content)
+        return Classification(value=value, suggestion=suggestion, raw_response=content, backend=self.name)
 
-        # Try to parse JSON response
-        value = None
-        suggestion = None
-        
-        try:
-            parsed = json.loads(content)
-            # Handle case where model returns just a number vs. full JSON object
-            if isinstance(parsed, dict):
-                value = parsed.get("value", 0)
-                suggestion = parsed.get("suggestion")
-            elif isinstance(parsed, int):
-                # Model returned just the number
-                value = parsed
-            else:
-                logger.error(f"Unexpected parsed type: {type(parsed)}")
-                raise HTTPException(status_code=500, detail=f"Unexpected response format: {content}")
-        except json.JSONDecodeError:
-            # If not JSON, try to extract just the number
-            match = re.search(r'[-+]?\d+', content)
-            if match:
-                value = int(match.group())
-            else: 
-                logger.error(f"Could not parse response: {content}")
-                raise HTTPException(status_code=500, detail=f"Could not parse response: {content}")
-
-        # Note: Database saving is disabled - using localStorage on frontend instead
-        
-        return ClassifyResponse(
-            value=value,
-            suggestion=suggestion,
-            raw_response=content,
-            classification_id=None
+    def stats(self) -> dict:
+        return {"name": self.name, "model": FINE_TUNED_MODEL}
+
+
+class LocalClassifierBackend:
+    """CPU model trained from data/dataset.jsonl; answers in milliseconds."""
+
+    name = "local"
+
+    def __init__(self, dataset_path: str | None = None):
+        self._dataset_path = dataset_path
+        self._model: LocalClassifier | None = None
+        self._loading = asyncio.Lock()
+
+    async def warm_up(self) -> None:
+        async with self._loading:
+            if self._model is None:
+                self._model = await asyncio.to_thread(LocalClassifier.from_dataset, self._dataset_path)
+
+    async def classify(self, prompt: str) -> Classification:
+        if self._model is None:
+            await self.warm_up()
+        prediction = self._model.predict(prompt)
+        return Classification(
+            value=prediction.value,
+            suggestion=prediction.suggestion,
+            raw_response=json.dumps({"value": prediction.value, "suggestion": prediction.suggestion}),
+            backend=self.name,
+            confidence=prediction.confidence,
         )
 
+    def stats(self) -> dict:
+        return {"name": self.name, "loaded": self._model is not None}
+
+
+class CascadeClassifierBackend:
+    """Local model first; only uncertain prompts go to the remote model."""
+
+    name = "cascade"
+
+    def __init__(self, local: ClassifierBackend, remote: ClassifierBackend, threshold: float):
+        self.local = local
+        self.remote = remote
+        self.threshold = threshold
+        self.local_answers = 0
+        self.escalations = 0
+
+    async def warm_up(self) -> None:
+        await self.local.warm_up()
+        await self.remote.warm_up()
+
+    async def classify(self, prompt: str) -> Classification:
+        result = await self.local.classify(prompt)
+        if result.confidence is not None and result.confidence >= self.threshold:
+            self.local_answers += 1
+            return result
+        self.escalations += 1
+        return await self.remote.classify(prompt)
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "threshold": self.threshold,
+            "local_answers": self.local_answers,
+            "escalations": self.escalations,
+            "local": self.local.stats(),
+            "remote": self.remote.stats(),
+        }
+
+
+def _build_backend(name: str) -> ClassifierBackend:
+    if name == "remote":
+        return RemoteClassifierBackend()
+    if name == "local":
+        return LocalClassifierBackend()
+    if name == "cascade":
+        return CascadeClassifierBackend(
+            LocalClassifierBackend(),
+            RemoteClassifierBackend(),
+            CLASSIFIER_LOCAL_THRESHOLD,
+        )
+    raise RuntimeError(f"Unknown CLASSIFIER_BACKEND {name!r}; expected remote, local or cascade")
+
+
+classifier_backend = _build_backend(CLASSIFIER_BACKEND)
+register_stats("classifier", classifier_backend.stats)
+
+
+async def warm_up() -> None:
+    await classifier_backend.warm_up()
+
+
+async def _classify(prompt: str) -> Classification:
+    """Classify one non-empty prompt, answering from the cache when possible."""
+    cache_key = classification_cache_key(prompt, FINE_TUNED_MODEL, SYSTEM_PROMPT)
+    cached = await classification_cache.get(cache_key)
+    if cached is not None:
+        return Classification(
+            value=cached.value,
+            suggestion=cached.suggestion,
+            raw_response=cached.raw_response,
+            backend="cache",
+        )
+
+    async def classify_and_cache() -> Classification:
+        logger.info(f"Classifying prompt: {prompt[:100]}...")
+
+        result = await classifier_backend.classify(prompt)
+        # Only the remote model's answers are cached: the key names that model.
+        if result.backend == RemoteClassifierBackend.name:
+            await classification_cache.set(
+                cache_key,
+                CachedClassification(
+                    value=result.value,
+                    suggestion=result.suggestion,
+                    raw_response=result.raw_response,
+                ),
+            )
+        return result
+
+    try:
+        return await classification_flights.do(cache_key, classify_and_cache)
     except HTTPException:
         raise
     except Exception as e:
-        import logging
-        import traceback
-        logger = logging.getLogger(__name__)
         logger.error(f"Classification failed: {str(e)}")
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"Classification failed: {str(e)}")
 
 
+def _log_classification(
+    http_request: Request,
+    prompt: str,
+    result: Classification,
+    user_id: int | None,
+    platform: str | None,
+) -> None:
+    """Queue the result for the server-side history; never waits on the database."""
+    writer = getattr(http_request.app.state, "classification_log", None)
+    if writer is None:
+        return
+    writer.submit(
+        uid=user_id,
+        platform=platform,
+        prompt=prompt,
+        value=result.value,
+        suggestion=result.suggestion,
+        model=FINE_TUNED_MODEL,
+        backend=result.backend,
+    )
+
+
+@router.post("/", response_model=ClassifyResponse)
+async def classify_prompt(request: ClassifyRequest, http_request: Request):
+    """
+    Classify a student prompt using the fine-tuned taxonomy model.
+    Returns the classification value (-3 to +2) and an optional suggestion.
+    When CLASSIFICATION_LOG_ENABLED is set the result is also appended to the
+    classifications table in the background, so classification_id stays None.
+    """
+    if not request.prompt or not request.prompt.strip():
+        raise HTTPException(status_code=400, detail="Prompt cannot be empty")
+
+    result = await _classify(request.prompt)
+    _log_classification(http_request, request.prompt, result, request.user_id, request.platform)
+
+    return ClassifyResponse(
+        value=result.value,
+        suggestion=result.suggestion,
+        raw_response=result.raw_response,
+        classification_id=None
+    )
+
+
+async def _classification_events(prompt: str) -> AsyncIterator[tuple[str, object]]:
+    """Yield ("value", int), ("suggestion", str) deltas, then ("done", Classification)."""
+    cache_key = classification_cache_key(prompt, FINE_TUNED_MODEL, SYSTEM_PROMPT)
+    cached = await classification_cache.get(cache_key)
+    if cached is not None or classifier_backend.name != RemoteClassifierBackend.name:
+        # Cached and local answers are already complete; send them in one go.
+        if cached is not None:
+            result = Classification(
+                value=cached.value,
+                suggestion=cached.suggestion,
+                raw_response=cached.raw_response,
+                backend="cache",
+            )
+        else:
+            result = await _classify(prompt)
+        yield "value", result.value
+        if result.suggestion:
+            yield "suggestion", result.suggestion
+        yield "done", result
+        return
+
+    logger.info(f"Streaming classification for prompt: {prompt[:100]}...")
+    parser = ClassificationStreamParser()
+    async for delta in _complete_stream(prompt):
+        for event in parser.feed(delta):
+            yield event
+
+    value, suggestion = _parse_classification(parser.content)
+    if parser.value is None:
+        # Not the usual JSON object (e.g. a bare number); report it now.
+        yield "value", value
+    result = Classification(value=value, suggestion=suggestion, raw_response=parser.content, backend=RemoteClassifierBackend.name)
+    await classification_cache.set(
+        cache_key,
+        CachedClassification(value=value, suggestion=suggestion, raw_response=parser.content),
+    )
+    yield "done", result
+
+
+@router.post("/stream")
+async def classify_prompt_stream(request: ClassifyRequest, http_request: Request):
+    """
+    Classify a prompt and stream the answer as server-sent events.
+    "value" is sent as soon as the model has produced the number, then
+    "suggestion" events carry the suggestion text as it is generated, and
+    "done" carries the same body POST /api/classify/ would return. A failure
+    after the stream has started is reported as an "error" event.
+    """
+    if not request.prompt or not request.prompt.strip():
+        raise HTTPException(status_code=400, detail="Prompt cannot be empty")
+
+    async def stream() -> AsyncIterator[str]:
+        try:
+            async for event, data in _classification_events(request.prompt):
+                if event == "value":
+                    yield format_sse("value", {"value": data})
+                elif event == "suggestion":
+                    yield format_sse("suggestion", {"delta": data})
+                else:
+                    _log_classification(http_request, request.prompt, data, request.user_id, request.platform)
+                    yield format_sse("done", ClassifyResponse(
+                        value=data.value,
+                        suggestion=data.suggestion,
+                        raw_response=data.raw_response,
+                        classification_id=None,
+                    ).model_dump())
+        except HTTPException as exc:
+            yield format_sse("error", {"detail": exc.detail})
+        except Exception as e:
+            logger.error(f"Streaming classification failed: {str(e)}")
+            logger.error(traceback.format_exc())
+            yield format_sse("error", {"detail": f"Classification failed: {str(e)}"})
+
+    return StreamingResponse(stream(), media_type=SSE_MEDIA_TYPE, headers=SSE_HEADERS)
+
+
+@router.post("/batch", response_model=ClassifyBatchResponse)
+async def classify_batch(request: ClassifyBatchRequest, http_request: Request):
+    """
+    Classify several prompts in one call.
+    Duplicate prompts (after normalization) are classified once, cached ones
+    are answered without an upstream call, and the rest run concurrently.
+    Results come back in input order; a failed prompt carries an error
+    instead of failing the whole batch.
+    """
+    batch_slots = asyncio.Semaphore(CLASSIFY_BATCH_CONCURRENCY)
+
+    async def classify_one(prompt: str) -> Classification | str:
+        async with batch_slots:
+            try:
+                return await _classify(prompt)
+            except HTTPException as exc:
+                return str(exc.detail)
+
+    unique_prompts: dict[str, str] = {}
+    for prompt in request.prompts:
+        if prompt and prompt.strip():
+            key = classification_cache_key(prompt, FINE_TUNED_MODEL, SYSTEM_PROMPT)
+            unique_prompts.setdefault(key, prompt)
+
+    keys = list(unique_prompts)
+    outcomes = await asyncio.gather(*(classify_one(unique_prompts[key]) for key in keys))
+    by_key = dict(zip(keys, outcomes))
+
+    results = []
+    for prompt in request.prompts:
+        if not prompt or not prompt.strip():
+            results.append(ClassifyBatchItem(error="Prompt cannot be empty"))
+            continue
+        outcome = by_key[classification_cache_key(prompt, FINE_TUNED_MODEL, SYSTEM_PROMPT)]
+        if isinstance(outcome, str):
+            results.append(ClassifyBatchItem(error=outcome))
+            continue
+        _log_classification(http_request, prompt, outcome, request.user_id, request.platform)
+        results.append(ClassifyBatchItem(
+            value=outcome.value,
+            suggestion=outcome.suggestion,
+            raw_response=outcome.raw_response,
+        ))
+
+    return ClassifyBatchResponse(results=results)
+
+
 @router.get("/health")
-async def health():
+async def health(http_request: Request):
     """Check if the classifier is configured properly."""
+    writer = getattr(http_request.app.state, "classification_log", None)
     return {
         "model": FINE_TUNED_MODEL,
         "api_key_set": bool(os.environ.get("OPENAI_API_KEY")),
+        "max_concurrency": CLASSIFY_MAX_CONCURRENCY,
+        "backend": classifier_backend.stats(),
+        "cache": classification_cache.stats(),
+        "single_flight": classification_flights.stats(),
+        "log": writer.stats() if writer is not None else None,
     }
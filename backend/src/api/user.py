@@ -1,6 +1,15 @@
-from fastapi import APIRouter, HTTPException, Request, status
+import asyncio
+from collections.abc import AsyncIterator
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, EmailStr
-from sqlalchemy import text
+
+from .. import queries
+from ..events import SSE_HEADERS, SSE_HEARTBEAT_SECONDS, SSE_MEDIA_TYPE, format_sse
+from ..pagination import MAX_PAGE_SIZE, JsonList, keyset_params, set_next_cursor, stream_ndjson, wants_ndjson
+from .accessory import ShopAccessoryResponse, UserAccessoryResponse
+from .anteater import AnteaterResponse
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
@@ -17,51 +26,50 @@ class UserResponse(BaseModel):
 	ants: int
 
 
+class UserSnapshotResponse(BaseModel):
+	user: UserResponse
+	anteater: AnteaterResponse | None
+	equipped: list[UserAccessoryResponse]
+	inventory: list[UserAccessoryResponse]
+	shop: list[ShopAccessoryResponse]
+
+
+user_list_json = JsonList(UserResponse)
+
+
 @router.get("", response_model=list[UserResponse])
-async def list_users(request: Request) -> list[UserResponse]:
-	query = text(
-		"""
-		SELECT id, name, email, COALESCE(ants, 0) AS ants
-		FROM users
-		ORDER BY id
-		"""
-	)
-	with request.app.state.db_engine.connect() as connection:
-		rows = connection.execute(query).mappings().all()
-	return [UserResponse.model_validate(row) for row in rows]
+async def list_users(
+	request: Request,
+	response: Response,
+	after_id: int | None = Query(None, ge=0),
+	limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+	stream: bool = False,
+) -> Response:
+	params = keyset_params(after_id, limit)
+	if wants_ndjson(request, stream):
+		return stream_ndjson(request.app.state.db_engine, queries.USER_PAGE, params, UserResponse)
+
+	async with request.app.state.db_engine.connect() as connection:
+		rows = (await connection.execute(queries.USER_PAGE, params)).mappings().all()
+	set_next_cursor(response, rows, limit)
+	return user_list_json.response(rows, response)
 
 
 @router.post("", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def create_user(payload: UserCreate, request: Request) -> UserResponse:
-	query = text(
-		"""
-		INSERT INTO users (name, email)
-		VALUES (:name, :email)
-		ON CONFLICT (email)
-		DO UPDATE SET name = EXCLUDED.name
-		RETURNING id, name, email, COALESCE(ants, 0) AS ants
-		"""
-	)
-	with request.app.state.db_engine.begin() as connection:
-		row = connection.execute(
-			query,
+	async with request.app.state.db_engine.begin() as connection:
+		row = (await connection.execute(
+			queries.UPSERT_USER,
 			{"name": payload.name, "email": str(payload.email)},
-		).mappings().one()
+		)).mappings().one()
 
 	return UserResponse.model_validate(row)
 
 
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user(user_id: int, request: Request) -> UserResponse:
-	query = text(
-		"""
-		SELECT id, name, email, COALESCE(ants, 0) AS ants
-		FROM users
-		WHERE id = :user_id
-		"""
-	)
-	with request.app.state.db_engine.connect() as connection:
-		row = connection.execute(query, {"user_id": user_id}).mappings().first()
+	async with request.app.state.db_engine.connect() as connection:
+		row = (await connection.execute(queries.USER_BY_ID, {"user_id": user_id})).mappings().first()
 
 	if row is None:
 		raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
@@ -70,17 +78,53 @@ async def get_user(user_id: int, request: Request) -> UserResponse:
 
 @router.get("/email/{email}", response_model=UserResponse)
 async def get_user_by_email(email: str, request: Request) -> UserResponse:
-	query = text(
-		"""
-		SELECT id, name, email, COALESCE(ants, 0) AS ants
-		FROM users
-		WHERE email = :email
-		"""
-	)
-	with request.app.state.db_engine.connect() as connection:
-		row = connection.execute(query, {"email": str(email)}).mappings().first()
+	async with request.app.state.db_engine.connect() as connection:
+		row = (await connection.execute(queries.USER_BY_EMAIL, {"email": str(email)})).mappings().first()
 
 	if row is None:
 		raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
-	return UserResponse.model_validate(row)
\ No newline at end of file
+	return UserResponse.model_validate(row)
+
+
+@router.get("/{user_id}/snapshot", response_model=UserSnapshotResponse)
+async def get_user_snapshot(user_id: int, request: Request) -> UserSnapshotResponse:
+	# Everything the popup needs on open (user, alive anteater and owned
+	# items) comes back in one round-trip; accessory details for the
+	# equipped, inventory and shop lists are filled in from the cached catalog.
+	async with request.app.state.db_engine.connect() as connection:
+		row = (await connection.execute(queries.USER_SNAPSHOT, {"user_id": user_id})).mappings().one()
+
+	if row["profile"] is None:
+		raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+	catalog = request.app.state.accessory_catalog
+	inventory = catalog.with_details(row["owned"])
+	anteater_id = row["anteater"]["id"] if row["anteater"] else None
+	return UserSnapshotResponse(
+		user=UserResponse.model_validate(row["profile"]),
+		anteater=AnteaterResponse.model_validate(row["anteater"]) if row["anteater"] else None,
+		equipped=[item for item in reversed(inventory) if anteater_id is not None and item["anteater_id"] == anteater_id],
+		inventory=inventory,
+		shop=catalog.shop_view(reversed(row["owned"])),
+	)
+
+
+# Live health, ants, death and equip events for this user, as server-sent
+# events. Clients load the snapshot first, then apply events on top of it.
+@router.get("/{user_id}/events")
+async def user_events(user_id: int, request: Request) -> StreamingResponse:
+	hub = request.app.state.events
+
+	async def stream() -> AsyncIterator[str]:
+		async with hub.subscribe(user_id) as queue:
+			yield "retry: 3000\n\n"
+			while not await request.is_disconnected():
+				try:
+					message = await asyncio.wait_for(queue.get(), SSE_HEARTBEAT_SECONDS)
+				except asyncio.TimeoutError:
+					yield ": ping\n\n"
+					continue
+				yield format_sse(message["event"], message["data"])
+
+	return StreamingResponse(stream(), media_type=SSE_MEDIA_TYPE, headers=SSE_HEADERS)
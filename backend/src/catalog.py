@@ -0,0 +1,144 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .notify import listen_forever
+
+logger = logging.getLogger(__name__)
+
+# Fired by the accessories_changed trigger (migration_004).
+CATALOG_CHANNEL = "accessories_changed"
+
+_LOAD_CATALOG = text(
+	"""
+	SELECT id, name, price, type, image_url, description
+	FROM accessories
+	ORDER BY id
+	"""
+).execution_options(query_name="load_accessory_catalog")
+
+
+class AccessoryCatalog:
+	"""Process-local copy of the accessories table.
+
+	The catalog is small and changes rarely, so every instance keeps all of it
+	in memory and serves listings, lookups and price checks from there. It is
+	reloaded whenever Postgres signals a change on CATALOG_CHANNEL, after every
+	(re)connection of that listener, and every refresh_interval seconds as a
+	fallback for missed notifications. version increases each time a reload
+	actually changes the contents, and digest is a hash of those contents
+	that HTTP validators can use.
+	"""
+
+	def __init__(self, engine: AsyncEngine, listen: bool = True, refresh_interval: float = 300.0):
+		self._engine = engine
+		self.listen = listen
+		self.refresh_interval = refresh_interval
+		self._items: list[dict] = []
+		self._by_id: dict[int, dict] = {}
+		self._lock = asyncio.Lock()
+		self._tasks: list[asyncio.Task] = []
+		self.version = 0
+		self.digest = ""
+		self.loaded_at: float | None = None
+		self.reloads = 0
+
+	@classmethod
+	def from_env(cls, engine: AsyncEngine) -> "AccessoryCatalog":
+		return cls(
+			engine,
+			listen=os.getenv("CATALOG_LISTEN", "true").lower() in ("1", "true", "yes"),
+			refresh_interval=float(os.getenv("CATALOG_REFRESH_SECONDS", "300")),
+		)
+
+	async def load(self) -> None:
+		async with self._lock:
+			async with self._engine.connect() as connection:
+				rows = [dict(row) for row in (await connection.execute(_LOAD_CATALOG)).mappings().all()]
+			if rows != self._items:
+				self._items = rows
+				self._by_id = {row["id"]: row for row in rows}
+				self.version += 1
+				# Content hash, identical on every instance serving the same rows
+				encoded = json.dumps(rows, sort_keys=True, default=str).encode("utf-8")
+				self.digest = hashlib.sha256(encoded).hexdigest()[:32]
+			self.loaded_at = time.time()
+			self.reloads += 1
+
+	def start(self) -> None:
+		if self.listen:
+			self._tasks.append(asyncio.create_task(
+				listen_forever(CATALOG_CHANNEL, self._on_notify, on_connect=self.load),
+				name="accessory-catalog-listener",
+			))
+		if self.refresh_interval > 0:
+			self._tasks.append(asyncio.create_task(self._refresh_periodically(), name="accessory-catalog-refresh"))
+
+	async def stop(self) -> None:
+		for task in self._tasks:
+			task.cancel()
+		await asyncio.gather(*self._tasks, return_exceptions=True)
+		self._tasks = []
+
+	async def _on_notify(self, payload: str) -> None:
+		await self.load()
+
+	async def _refresh_periodically(self) -> None:
+		while True:
+			await asyncio.sleep(self.refresh_interval)
+			try:
+				await self.load()
+			except Exception:
+				logger.exception("Periodic accessory catalog refresh failed")
+
+	def all(self) -> list[dict]:
+		return self._items
+
+	def get(self, accessory_id: int) -> dict | None:
+		return self._by_id.get(accessory_id)
+
+	def page(self, after_id: int | None, limit: int | None) -> list[dict]:
+		"""Same keyset semantics as the SQL list endpoints, over the cached rows."""
+		rows = [row for row in self._items if row["id"] > (after_id or 0)]
+		return rows if limit is None else rows[:limit]
+
+	def with_details(self, owned: list) -> list[dict]:
+		"""Attach catalog details to has_accessory rows, keeping their order.
+
+		Rows whose accessory is unknown are dropped, like the inner JOIN this
+		replaces would drop them.
+		"""
+		rows = []
+		for row in owned:
+			accessory = self._by_id.get(row["accessory_id"])
+			if accessory is not None:
+				rows.append({**accessory, **row})
+		return rows
+
+	def shop_view(self, owned: list) -> list[dict]:
+		"""The whole catalog with ownership flags, one row per owned copy."""
+		owned_ids: dict[int, list[int]] = {}
+		for row in owned:
+			owned_ids.setdefault(row["accessory_id"], []).append(row["id"])
+		return [
+			{**accessory, "owned": user_accessory_id is not None, "user_accessory_id": user_accessory_id}
+			for accessory in self._items
+			for user_accessory_id in owned_ids.get(accessory["id"], [None])
+		]
+
+	def stats(self) -> dict:
+		return {
+			"size": len(self._items),
+			"version": self.version,
+			"digest": self.digest,
+			"loaded_at": self.loaded_at,
+			"reloads": self.reloads,
+			"listening": self.listen,
+			"refresh_interval": self.refresh_interval,
+		}
@@ -0,0 +1,157 @@
+"""
+Cache for prompt classifications.
+
+The classifier runs at temperature 0, so the same prompt against the same
+model and system prompt always gets the same answer. Results are kept in an
+in-process LRU with a TTL, optionally backed by a SQLite file so they survive
+restarts and can be shared by workers on the same host.
+"""
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class CachedClassification:
+    value: int
+    suggestion: str | None
+    raw_response: str
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse whitespace and case so trivially different resends share a key."""
+    return " ".join(prompt.split()).casefold()
+
+
+def classification_cache_key(prompt: str, model: str, system_prompt: str) -> str:
+    digest = hashlib.sha256()
+    for part in (normalize_prompt(prompt), model, system_prompt):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class _SQLiteStore:
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS classification_cache (
+                    key TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL,
+                    suggestion TEXT,
+                    raw_response TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+
+    def get(self, key: str, not_before: float) -> CachedClassification | None:
+        with self._lock:
+            row = self._connection.execute(
+                """
+                SELECT value, suggestion, raw_response
+                FROM classification_cache
+                WHERE key = ? AND created_at >= ?
+                """,
+                (key, not_before),
+            ).fetchone()
+        if row is None:
+            return None
+        return CachedClassification(value=row[0], suggestion=row[1], raw_response=row[2])
+
+    def set(self, key: str, entry: CachedClassification, created_at: float) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                """
+                INSERT OR REPLACE INTO classification_cache
+                    (key, value, suggestion, raw_response, created_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (key, entry.value, entry.suggestion, entry.raw_response, created_at),
+            )
+
+
+class ClassificationCache:
+    """LRU + TTL cache of classification results, with an optional SQLite tier."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float, sqlite_path: str | None = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, CachedClassification]] = OrderedDict()
+        self._store = _SQLiteStore(sqlite_path) if sqlite_path and max_entries > 0 else None
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "ClassificationCache":
+        return cls(
+            max_entries=int(os.environ.get("CLASSIFY_CACHE_MAX_ENTRIES", "2048")),
+            ttl_seconds=float(os.environ.get("CLASSIFY_CACHE_TTL_SECONDS", "86400")),
+            sqlite_path=os.environ.get("CLASSIFY_CACHE_SQLITE_PATH") or None,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    async def get(self, key: str) -> CachedClassification | None:
+        if not self.enabled:
+            return None
+
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None:
+            stored_at, value = entry
+            if now - stored_at <= self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+
+        if self._store is not None:
+            value = await asyncio.to_thread(self._store.get, key, time.time() - self.ttl_seconds)
+            if value is not None:
+                self._remember(key, value, now)
+                self.hits += 1
+                self.persistent_hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: CachedClassification) -> None:
+        if not self.enabled:
+            return
+        self._remember(key, value, time.monotonic())
+        if self._store is not None:
+            await asyncio.to_thread(self._store.set, key, value, time.time())
+
+    def _remember(self, key: str, value: CachedClassification, stored_at: float) -> None:
+        self._entries[key] = (stored_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "persistent": self._store is not None,
+            "hits": self.hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import os
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+# One multi-row INSERT per batch: each column travels as an array and unnest
+# turns them back into rows, so a flush is a single round-trip.
+_INSERT_BATCH = text(
+	"""
+	INSERT INTO classifications (uid, platform, prompt, value, suggestion, model, backend)
+	SELECT *
+	FROM unnest(
+		CAST(:uids AS INTEGER[]),
+		CAST(:platforms AS VARCHAR[]),
+		CAST(:prompts AS TEXT[]),
+		CAST(:values AS INTEGER[]),
+		CAST(:suggestions AS TEXT[]),
+		CAST(:models AS VARCHAR[]),
+		CAST(:backends AS VARCHAR[])
+	)
+	"""
+).execution_options(query_name="insert_classifications")
+
+_STOP = object()
+
+
+class ClassificationLogWriter:
+	"""Write-behind queue that persists classifications in batches.
+
+	submit() never waits on the database: records are queued and a
+	background task flushes them once batch_size records are waiting or
+	flush_interval seconds have passed since the first one arrived. If the
+	queue is full the record is dropped and counted rather than slowing the
+	request down. stop() flushes everything queued before returning.
+	"""
+
+	def __init__(
+		self,
+		engine: AsyncEngine,
+		batch_size: int = 200,
+		flush_interval: float = 1.0,
+		max_queue: int = 10000,
+	):
+		self._engine = engine
+		self.batch_size = batch_size
+		self.flush_interval = flush_interval
+		self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+		self._task: asyncio.Task | None = None
+		self._closed = False
+		self.written = 0
+		self.dropped = 0
+		self.failed = 0
+		self.batches = 0
+
+	@classmethod
+	def from_env(cls, engine: AsyncEngine) -> "ClassificationLogWriter | None":
+		if os.getenv("CLASSIFICATION_LOG_ENABLED", "false").lower() not in ("1", "true", "yes"):
+			return None
+		return cls(
+			engine,
+			batch_size=int(os.getenv("CLASSIFICATION_LOG_BATCH_SIZE", "200")),
+			flush_interval=float(os.getenv("CLASSIFICATION_LOG_FLUSH_SECONDS", "1.0")),
+			max_queue=int(os.getenv("CLASSIFICATION_LOG_MAX_QUEUE", "10000")),
+		)
+
+	def start(self) -> None:
+		self._task = asyncio.create_task(self._run(), name="classification-log-writer")
+
+	async def stop(self) -> None:
+		if self._task is None:
+			return
+		self._closed = True
+		await self._queue.put(_STOP)
+		await self._task
+		self._task = None
+
+	def submit(
+		self,
+		*,
+		uid: int | None,
+		platform: str | None,
+		prompt: str,
+		value: int,
+		suggestion: str | None,
+		model: str,
+		backend: str,
+	) -> None:
+		if self._closed:
+			self.dropped += 1
+			return
+		try:
+			self._queue.put_nowait((uid, platform, prompt, value, suggestion, model, backend))
+		except asyncio.QueueFull:
+			self.dropped += 1
+
+	async def _run(self) -> None:
+		loop = asyncio.get_running_loop()
+		while True:
+			item = await self._queue.get()
+			if item is _STOP:
+				return
+			batch = [item]
+			stopping = False
+			deadline = loop.time() + self.flush_interval
+			while len(batch) < self.batch_size:
+				remaining = deadline - loop.time()
+				if remaining <= 0:
+					break
+				try:
+					item = await asyncio.wait_for(self._queue.get(), remaining)
+				except asyncio.TimeoutError:
+					break
+				if item is _STOP:
+					stopping = True
+					break
+				batch.append(item)
+			await self._flush(batch)
+			if stopping:
+				return
+
+	async def _flush(self, batch: list[tuple]) -> None:
+		uids, platforms, prompts, values, suggestions, models, backends = (list(column) for column in zip(*batch))
+		try:
+			async with self._engine.begin() as connection:
+				await connection.execute(
+					_INSERT_BATCH,
+					{
+						"uids": uids,
+						"platforms": platforms,
+						"prompts": prompts,
+						"values": values,
+						"suggestions": suggestions,
+						"models": models,
+						"backends": backends,
+					},
+				)
+		except Exception:
+			self.failed += len(batch)
+			logger.exception("Failed to write %d classification log records", len(batch))
+			return
+		self.written += len(batch)
+		self.batches += 1
+
+	def stats(self) -> dict:
+		return {
+			"queued": self._queue.qsize(),
+			"written": self.written,
+			"dropped": self.dropped,
+			"failed": self.failed,
+			"batches": self.batches,
+			"batch_size": self.batch_size,
+			"flush_interval": self.flush_interval,
+		}
@@ -0,0 +1,73 @@
+"""
+Incremental parser for streamed classification completions.
+
+The fine-tuned model answers with a small JSON object such as
+{"value": -2, "suggestion": "..."}. Fed the completion one delta at a time,
+ClassificationStreamParser reports the value as soon as its number is
+complete and then the suggestion text as it is generated, so callers can
+act on the verdict without waiting for the whole completion.
+"""
+import json
+import re
+
+_VALUE_RE = re.compile(r'"value"\s*:\s*([-+]?\d+)\s*[,}]')
+_SUGGESTION_RE = re.compile(r'"suggestion"\s*:\s*"')
+
+
+class ClassificationStreamParser:
+    def __init__(self):
+        self.content = ""
+        self.value: int | None = None
+        self.suggestion = ""
+        self._suggestion_start: int | None = None
+        self._suggestion_pos = 0
+        self._suggestion_done = False
+
+    def feed(self, delta: str) -> list[tuple[str, object]]:
+        """Add a completion delta; returns ("value", int) and ("suggestion", str) events."""
+        self.content += delta
+        events: list[tuple[str, object]] = []
+
+        if self.value is None:
+            match = _VALUE_RE.search(self.content)
+            if match:
+                self.value = int(match.group(1))
+                events.append(("value", self.value))
+
+        if self._suggestion_start is None:
+            match = _SUGGESTION_RE.search(self.content)
+            if match:
+                self._suggestion_start = self._suggestion_pos = match.end()
+
+        if self._suggestion_start is not None and not self._suggestion_done:
+            text = self._read_suggestion()
+            if text:
+                self.suggestion += text
+                events.append(("suggestion", text))
+        return events
+
+    def _read_suggestion(self) -> str:
+        """Decode the suggestion characters that have fully arrived since the last call."""
+        raw = self.content[self._suggestion_pos:]
+        end = 0
+        while end < len(raw):
+            char = raw[end]
+            if char == '"':
+                self._suggestion_done = True
+                break
+            if char == "\\":
+                # Stop before an escape whose characters have not all arrived.
+                size = 6 if raw[end + 1:end + 2] == "u" else 2
+                if end + size > len(raw):
+                    break
+                end += size
+            else:
+                end += 1
+        complete = raw[:end]
+        # Hold back the first half of a surrogate pair until its partner arrives.
+        if not self._suggestion_done and re.search(r"\\u[dD][89abAB][0-9a-fA-F]{2}$", complete):
+            complete = complete[:-6]
+        if not complete:
+            return ""
+        self._suggestion_pos += len(complete)
+        return json.loads(f'"{complete}"')
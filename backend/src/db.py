@@ -1,13 +1,21 @@
 import os
+import threading
+import time
 from pathlib import Path
 
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, make_url, text
 from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 _ENV_PATH = Path(__file__).resolve().parents[1] / ".env"
 load_dotenv(_ENV_PATH)
 
+# psycopg3 ships both a sync and an async driver under the same dialect name.
+_PSYCOPG_DRIVERNAME = "postgresql+psycopg"
+
 
 def get_database_url() -> str:
 	database_url = os.getenv("DB_CONNECTION")
@@ -16,14 +24,157 @@ def get_database_url() -> str:
 	return database_url
 
 
-def get_db_engine() -> Engine:
-	return create_engine(get_database_url(), pool_pre_ping=True)
+def get_psycopg_database_url() -> str:
+	url = make_url(get_database_url())
+	if url.drivername in ("postgres", "postgresql", "postgresql+psycopg2"):
+		url = url.set(drivername=_PSYCOPG_DRIVERNAME)
+	return url.render_as_string(hide_password=False)
+
+
+def get_psycopg_conninfo() -> str:
+	"""Plain libpq URL for raw psycopg connections (e.g. LISTEN)."""
+	url = make_url(get_database_url()).set(drivername="postgresql")
+	return url.render_as_string(hide_password=False)
+
+
+def _env_flag(name: str, default: str) -> bool:
+	return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+
+# record_info keys used to time how long opening a new connection takes
+_CONNECT_STARTED = "pocketzot_connect_started"
+_CONNECT_SECONDS = "pocketzot_connect_seconds"
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+	"""Queue pool that records how long checkouts wait for a connection.
+
+	Only public API is used: connect() times each checkout, and the
+	do_connect / connect events installed by _time_new_connections time
+	opening new connections. That part is reported as connect time and not
+	counted as waiting, so the wait figures are pure queueing.
+	"""
+
+	def __init__(self, *args, **kwargs):
+		super().__init__(*args, **kwargs)
+		self._stats_lock = threading.Lock()
+		self.checkouts = 0
+		self.checkout_timeouts = 0
+		self.wait_seconds_total = 0.0
+		self.wait_seconds_max = 0.0
+		self.connects = 0
+		self.connect_seconds_total = 0.0
+		self.connect_seconds_max = 0.0
+
+	def connect(self):
+		started = time.perf_counter()
+		try:
+			connection = super().connect()
+		except PoolTimeoutError:
+			self._record(time.perf_counter() - started, None, timed_out=True)
+			raise
+		record_info = connection.record_info
+		connecting = record_info.pop(_CONNECT_SECONDS, None) if record_info is not None else None
+		self._record(time.perf_counter() - started - (connecting or 0.0), connecting)
+		return connection
+
+	def _record(self, waited: float, connecting: float | None, timed_out: bool = False) -> None:
+		waited = max(0.0, waited)
+		with self._stats_lock:
+			self.checkouts += 1
+			self.checkout_timeouts += timed_out
+			self.wait_seconds_total += waited
+			self.wait_seconds_max = max(self.wait_seconds_max, waited)
+			if connecting is not None:
+				self.connects += 1
+				self.connect_seconds_total += connecting
+				self.connect_seconds_max = max(self.connect_seconds_max, connecting)
+
+
+def _time_new_connections(engine: AsyncEngine) -> None:
+	"""Note on each pool entry how long opening its DBAPI connection took."""
+
+	@event.listens_for(engine.sync_engine, "do_connect")
+	def _connect_started(dialect, connection_record, cargs, cparams):
+		if connection_record is not None:
+			connection_record.record_info[_CONNECT_STARTED] = time.perf_counter()
+
+	@event.listens_for(engine.sync_engine, "connect")
+	def _connect_finished(dbapi_connection, connection_record):
+		started = connection_record.record_info.pop(_CONNECT_STARTED, None)
+		if started is not None:
+			# += covers a checkout that had to reconnect more than once
+			seconds = connection_record.record_info.get(_CONNECT_SECONDS, 0.0)
+			connection_record.record_info[_CONNECT_SECONDS] = seconds + time.perf_counter() - started
+
+
+def get_engine_options() -> dict:
+	"""Pool and driver settings for the app engine, read from the environment.
+
+	DB_PGBOUNCER=true disables psycopg's automatic prepared statements, which
+	PgBouncer in transaction pooling mode cannot route; otherwise
+	DB_PREPARE_THRESHOLD sets how soon they kick in. The statement timeout
+	is sent as a startup option; behind PgBouncer that needs
+	ignore_startup_parameters = options, or leave DB_STATEMENT_TIMEOUT_MS unset.
+	"""
+	connect_args: dict = {}
+	statement_timeout_ms = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+	if statement_timeout_ms > 0:
+		connect_args["options"] = f"-c statement_timeout={statement_timeout_ms}"
+	if _env_flag("DB_PGBOUNCER", "false"):
+		connect_args["prepare_threshold"] = None
+	else:
+		# psycopg prepares a statement server-side after it has run this many
+		# times on a connection (its own default is 5). The routers' statements
+		# are fixed strings (see queries.py), so preparing from the second
+		# execution on saves Postgres re-parsing and re-planning them.
+		connect_args["prepare_threshold"] = int(os.getenv("DB_PREPARE_THRESHOLD", "1"))
+
+	return {
+		"poolclass": TimedQueuePool,
+		"pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+		"max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+		"pool_timeout": float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "10")),
+		"pool_recycle": int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800")),
+		# Recycling already retires old connections; pre-ping costs a
+		# round-trip per checkout, so it is opt-in.
+		"pool_pre_ping": _env_flag("DB_POOL_PRE_PING", "false"),
+		"connect_args": connect_args,
+	}
+
+
+def get_db_engine() -> AsyncEngine:
+	engine = create_async_engine(get_psycopg_database_url(), **get_engine_options())
+	_time_new_connections(engine)
+	return engine
+
+
+def pool_stats(engine: AsyncEngine) -> dict:
+	pool = engine.pool
+	stats = {
+		"size": pool.size(),
+		"checked_out": pool.checkedout(),
+		"checked_in": pool.checkedin(),
+		"overflow": pool.overflow(),
+	}
+	if isinstance(pool, TimedQueuePool):
+		stats.update(
+			checkouts=pool.checkouts,
+			checkout_timeouts=pool.checkout_timeouts,
+			wait_seconds_avg=pool.wait_seconds_total / pool.checkouts if pool.checkouts else 0.0,
+			wait_seconds_max=pool.wait_seconds_max,
+			connects=pool.connects,
+			connect_seconds_avg=pool.connect_seconds_total / pool.connects if pool.connects else 0.0,
+			connect_seconds_max=pool.connect_seconds_max,
+		)
+	return stats
+
+
+def get_sync_db_engine() -> Engine:
+	"""Blocking engine for scripts that run outside the event loop."""
+	return create_engine(get_psycopg_database_url(), pool_pre_ping=True)
 
 
-def check_db_connection(engine: Engine) -> bool:
-	try:
-		with engine.connect() as connection:
-			connection.execute(text("SELECT 1"))
-		return True
-	except Exception:
-		return False
+async def ping_db(engine: AsyncEngine) -> None:
+	async with engine.connect() as connection:
+		await connection.execute(text("SELECT 1"))
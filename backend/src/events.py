@@ -0,0 +1,140 @@
+import asyncio
+import json
+import logging
+import os
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from .notify import listen_forever
+
+logger = logging.getLogger(__name__)
+
+EVENTS_CHANNEL = "user_events"
+SSE_MEDIA_TYPE = "text/event-stream"
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+# Comment lines sent while idle keep proxies from closing the stream.
+SSE_HEARTBEAT_SECONDS = 15.0
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more.
+_MAX_NOTIFY_PAYLOAD = 7900
+
+_NOTIFY = text("SELECT pg_notify(:channel, :payload)").execution_options(query_name="notify_user_event")
+
+
+def format_sse(event: str, data: dict) -> str:
+	return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class EventHub:
+	"""Per-user pub/sub for pushing state changes to connected clients.
+
+	Routers make their changes inside transaction() and publish on its
+	connection, so an event is only sent if that transaction commits. In
+	"notify" mode publish issues pg_notify in the transaction; Postgres
+	delivers it once COMMIT succeeds to every worker (this one included)
+	through its LISTEN connection, so a client sees changes made by any
+	worker. In "local" mode the event is held until COMMIT has returned and
+	then handed to this process's subscribers. A subscriber that falls
+	max_queue events behind loses the oldest ones rather than blocking
+	publishers.
+	"""
+
+	def __init__(self, engine: AsyncEngine, fanout: str = "local", max_queue: int = 100):
+		if fanout not in ("local", "notify"):
+			raise RuntimeError(f"Unknown EVENTS_FANOUT {fanout!r}; expected local or notify")
+		self._engine = engine
+		self.fanout = fanout
+		self.max_queue = max_queue
+		self._subscribers: dict[int, set[asyncio.Queue]] = {}
+		# Locally delivered events per open transaction(), sent after COMMIT
+		self._pending: dict[AsyncConnection, list[dict]] = {}
+		self._task: asyncio.Task | None = None
+		self.published = 0
+		self.delivered = 0
+		self.dropped = 0
+
+	@classmethod
+	def from_env(cls, engine: AsyncEngine) -> "EventHub":
+		return cls(
+			engine,
+			fanout=os.getenv("EVENTS_FANOUT", "local"),
+			max_queue=int(os.getenv("EVENTS_MAX_QUEUE", "100")),
+		)
+
+	def start(self) -> None:
+		if self.fanout == "notify":
+			self._task = asyncio.create_task(listen_forever(EVENTS_CHANNEL, self._on_notify), name="event-hub-listener")
+
+	async def stop(self) -> None:
+		if self._task is None:
+			return
+		self._task.cancel()
+		await asyncio.gather(self._task, return_exceptions=True)
+		self._task = None
+
+	@asynccontextmanager
+	async def subscribe(self, uid: int) -> AsyncIterator[asyncio.Queue]:
+		queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue)
+		self._subscribers.setdefault(uid, set()).add(queue)
+		try:
+			yield queue
+		finally:
+			queues = self._subscribers.get(uid)
+			if queues is not None:
+				queues.discard(queue)
+				if not queues:
+					del self._subscribers[uid]
+
+	@asynccontextmanager
+	async def transaction(self) -> AsyncIterator[AsyncConnection]:
+		"""engine.begin() whose published events go out only after COMMIT returns."""
+		async with self._engine.begin() as connection:
+			pending = self._pending[connection] = []
+			try:
+				yield connection
+			finally:
+				del self._pending[connection]
+		for message in pending:
+			self._deliver(message)
+
+	async def publish(self, connection: AsyncConnection, uid: int, event: str, data: dict) -> None:
+		"""Queue an event for uid's subscribers, sent if connection's transaction commits."""
+		pending = self._pending.get(connection)
+		if pending is None:
+			raise RuntimeError("EventHub.publish needs a connection from EventHub.transaction()")
+		self.published += 1
+		message = {"uid": uid, "event": event, "data": data}
+		if self.fanout == "notify":
+			payload = json.dumps(message, default=str)
+			if len(payload) <= _MAX_NOTIFY_PAYLOAD:
+				await connection.execute(_NOTIFY, {"channel": EVENTS_CHANNEL, "payload": payload})
+				return
+			logger.warning("Event %s for user %s is too large for NOTIFY; delivering locally", event, uid)
+		pending.append(message)
+
+	async def _on_notify(self, payload: str) -> None:
+		try:
+			self._deliver(json.loads(payload))
+		except (ValueError, KeyError):
+			logger.warning("Ignoring malformed event payload: %.200s", payload)
+
+	def _deliver(self, message: dict) -> None:
+		for queue in self._subscribers.get(message["uid"], ()):
+			if queue.full():
+				queue.get_nowait()
+				self.dropped += 1
+			queue.put_nowait(message)
+			self.delivered += 1
+
+	def stats(self) -> dict:
+		return {
+			"fanout": self.fanout,
+			"subscribed_users": len(self._subscribers),
+			"subscribers": sum(len(queues) for queues in self._subscribers.values()),
+			"published": self.published,
+			"delivered": self.delivered,
+			"dropped": self.dropped,
+		}
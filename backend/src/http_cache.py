@@ -0,0 +1,52 @@
+from collections.abc import Callable
+
+from fastapi import HTTPException, Request, Response, status
+
+from .pagination import NDJSON_MEDIA_TYPE
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+	if not if_none_match:
+		return False
+	if if_none_match.strip() == "*":
+		return True
+	# If-None-Match uses the weak comparison, so W/ prefixes are ignored
+	candidates = (candidate.strip().removeprefix("W/") for candidate in if_none_match.split(","))
+	return etag in candidates
+
+
+class ConditionalGet:
+	"""Route dependency adding ETag/Cache-Control and answering 304s.
+
+	validator(request) returns an opaque string that changes whenever the
+	response body would. When the client's If-None-Match already names it,
+	the dependency raises a 304 before the route runs, so nothing is queried
+	or serialized. Otherwise the headers are set on the response; routes that
+	return a Response of their own should copy them over with cache_headers().
+	"""
+
+	def __init__(self, validator: Callable[[Request], str], max_age: int = 60, private: bool = False):
+		self._validator = validator
+		self.cache_control = f"{'private' if private else 'public'}, max-age={max_age}"
+
+	def __call__(self, request: Request, response: Response) -> None:
+		headers = {
+			"ETag": f'"{self._validator(request)}"',
+			"Cache-Control": self.cache_control,
+			"Vary": "Accept",
+		}
+		if _etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+			raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+		response.headers.update(headers)
+
+
+def cache_headers(response: Response) -> dict[str, str]:
+	return {name: response.headers[name] for name in ("ETag", "Cache-Control", "Vary") if name in response.headers}
+
+
+def catalog_validator(request: Request) -> str:
+	"""Validator for responses that depend only on the accessory catalog."""
+	digest = request.app.state.accessory_catalog.digest
+	if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+		return f"{digest}-ndjson"
+	return digest
@@ -0,0 +1,159 @@
+"""
+CPU-only prompt classifier trained from data/dataset.jsonl.
+
+Prompts are featurized as TF-IDF weighted word unigrams/bigrams plus
+character 3-5-grams and scored by a softmax regression fitted at load time.
+Training on the bundled dataset takes about a second and inference is a
+few sparse dot products, so easy prompts can be answered without a
+network call. The suggestion comes from the most similar training prompt
+with the predicted label.
+"""
+import json
+import math
+import os
+import random
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+DEFAULT_DATASET_PATH = Path(__file__).resolve().parents[2] / "data" / "dataset.jsonl"
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+
+@dataclass(frozen=True)
+class LocalPrediction:
+    value: int
+    confidence: float
+    suggestion: str | None
+
+
+@dataclass(frozen=True)
+class _Example:
+    prompt: str
+    value: int
+    suggestion: str | None
+
+
+def load_examples(path: str | Path) -> list[_Example]:
+    """Read (prompt, value, suggestion) triples from the fine-tuning dataset."""
+    examples = []
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            messages = json.loads(line)["messages"]
+            prompt = next(m["content"] for m in messages if m["role"] == "user")
+            answer = json.loads(next(m["content"] for m in messages if m["role"] == "assistant"))
+            examples.append(_Example(prompt, int(answer["value"]), answer.get("suggestion")))
+    return examples
+
+
+def _features(prompt: str) -> dict[str, float]:
+    text = " ".join(prompt.lower().split())
+    counts: dict[str, float] = {}
+    words = _WORD_RE.findall(text)
+    for word in words:
+        counts["w:" + word] = counts.get("w:" + word, 0.0) + 1.0
+    for first, second in zip(words, words[1:]):
+        key = f"b:{first} {second}"
+        counts[key] = counts.get(key, 0.0) + 1.0
+    padded = f" {text} "
+    for size in (3, 4, 5):
+        for start in range(len(padded) - size + 1):
+            key = "c:" + padded[start:start + size]
+            counts[key] = counts.get(key, 0.0) + 1.0
+    return counts
+
+
+class LocalClassifier:
+    def __init__(self, epochs: int = 10, learning_rate: float = 1.0, l2: float = 1e-4, seed: int = 7):
+        self.epochs = epochs
+        self.learning_rate = learning_rate
+        self.l2 = l2
+        self.seed = seed
+        self.labels: list[int] = []
+        self._idf: dict[str, float] = {}
+        self._weights: dict[int, dict[str, float]] = {}
+        self._bias: dict[int, float] = {}
+        self._examples: list[tuple[_Example, dict[str, float]]] = []
+
+    @classmethod
+    def from_dataset(cls, path: str | Path | None = None) -> "LocalClassifier":
+        path = path or os.environ.get("CLASSIFIER_DATASET_PATH") or DEFAULT_DATASET_PATH
+        model = cls()
+        model.fit(load_examples(path))
+        return model
+
+    def _vectorize(self, prompt: str) -> dict[str, float]:
+        vector = {
+            key: (1.0 + math.log(count)) * self._idf[key]
+            for key, count in _features(prompt).items()
+            if key in self._idf
+        }
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        if norm:
+            for key in vector:
+                vector[key] /= norm
+        return vector
+
+    def _probabilities(self, vector: dict[str, float]) -> dict[int, float]:
+        scores = {
+            label: self._bias[label] + sum(
+                self._weights[label].get(key, 0.0) * weight for key, weight in vector.items()
+            )
+            for label in self.labels
+        }
+        top = max(scores.values())
+        exps = {label: math.exp(score - top) for label, score in scores.items()}
+        total = sum(exps.values())
+        return {label: value / total for label, value in exps.items()}
+
+    def fit(self, examples: list[_Example]) -> None:
+        if not examples:
+            raise ValueError("Cannot train the local classifier on an empty dataset")
+
+        document_frequency: dict[str, int] = {}
+        for example in examples:
+            for key in _features(example.prompt):
+                document_frequency[key] = document_frequency.get(key, 0) + 1
+        count = len(examples)
+        self._idf = {key: math.log((1 + count) / (1 + df)) + 1.0 for key, df in document_frequency.items()}
+
+        self.labels = sorted({example.value for example in examples})
+        self._weights = {label: {} for label in self.labels}
+        self._bias = {label: 0.0 for label in self.labels}
+        self._examples = [(example, self._vectorize(example.prompt)) for example in examples]
+
+        order = list(range(count))
+        rng = random.Random(self.seed)
+        for epoch in range(self.epochs):
+            rng.shuffle(order)
+            step = self.learning_rate / (1.0 + epoch * 0.1)
+            for index in order:
+                example, vector = self._examples[index]
+                probabilities = self._probabilities(vector)
+                for label in self.labels:
+                    gradient = probabilities[label] - (1.0 if label == example.value else 0.0)
+                    weights = self._weights[label]
+                    for key, weight in vector.items():
+                        current = weights.get(key, 0.0)
+                        weights[key] = current - step * (gradient * weight + self.l2 * current)
+                    self._bias[label] -= step * gradient
+
+    def predict(self, prompt: str) -> LocalPrediction:
+        vector = self._vectorize(prompt)
+        probabilities = self._probabilities(vector)
+        value = max(probabilities, key=probabilities.get)
+
+        best_similarity = -1.0
+        suggestion = None
+        for example, example_vector in self._examples:
+            if example.value != value:
+                continue
+            similarity = sum(weight * example_vector.get(key, 0.0) for key, weight in vector.items())
+            if similarity > best_similarity:
+                best_similarity = similarity
+                suggestion = example.suggestion
+
+        return LocalPrediction(value=value, confidence=probabilities[value], suggestion=suggestion)
@@ -1,28 +1,83 @@
+import asyncio
+import os
 from datetime import datetime, timezone
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from pydantic import BaseModel
 
 from .api.anteater import router as anteater_router
 from .api.ants import router as ants_router
 from .api.user import router as user_router
 from .api.accessory import router as accessory_router
+from .api.classifier import CLASSIFIER_BACKEND
+from .api.classifier import check_upstream as check_classifier_upstream
+from .api.classifier import close_client as close_classifier_client
 from .api.classifier import router as classifier_router
-from .db import check_db_connection, get_db_engine
+from .api.classifier import warm_up as warm_up_classifier
+from .catalog import AccessoryCatalog
+from .classification_log import ClassificationLogWriter
+from .db import get_db_engine, get_sync_db_engine, ping_db, pool_stats
+from .events import EventHub
+from .metrics import REGISTRY, MetricsMiddleware, instrument_engine, register_stats
+from .migrations import run_migrations
+from .pagination import NEXT_CURSOR_HEADER
+from .probes import ReadinessMonitor
 
 
 class EchoRequest(BaseModel):
 	message: str
 
 
+def _run_migrations() -> None:
+	engine = get_sync_db_engine()
+	try:
+		run_migrations(engine)
+	finally:
+		engine.dispose()
+
+
 def create_app() -> FastAPI:
 	@asynccontextmanager
 	async def lifespan(app_instance: FastAPI):
+		if os.getenv("RUN_MIGRATIONS_ON_STARTUP", "false").lower() in ("1", "true", "yes"):
+			await asyncio.to_thread(_run_migrations)
 		app_instance.state.db_engine = get_db_engine()
+		instrument_engine(app_instance.state.db_engine)
+		register_stats("db_pool", lambda: pool_stats(app_instance.state.db_engine))
+		app_instance.state.accessory_catalog = AccessoryCatalog.from_env(app_instance.state.db_engine)
+		await app_instance.state.accessory_catalog.load()
+		app_instance.state.accessory_catalog.start()
+		register_stats("accessory_catalog", app_instance.state.accessory_catalog.stats)
+		app_instance.state.events = EventHub.from_env(app_instance.state.db_engine)
+		app_instance.state.events.start()
+		register_stats("events", app_instance.state.events.stats)
+		app_instance.state.classification_log = ClassificationLogWriter.from_env(app_instance.state.db_engine)
+		if app_instance.state.classification_log is not None:
+			app_instance.state.classification_log.start()
+			register_stats("classification_log", app_instance.state.classification_log.stats)
+		await warm_up_classifier()
+		app_instance.state.readiness = ReadinessMonitor.from_env()
+		app_instance.state.readiness.add_check("database", lambda: ping_db(app_instance.state.db_engine))
+		if CLASSIFIER_BACKEND != "local":
+			app_instance.state.readiness.add_check(
+				"openai",
+				check_classifier_upstream,
+				required=os.getenv("READINESS_REQUIRE_OPENAI", "false").lower() in ("1", "true", "yes"),
+			)
+		app_instance.state.readiness.start()
+		register_stats("readiness", app_instance.state.readiness.snapshot)
 		yield
-		app_instance.state.db_engine.dispose()
+		await app_instance.state.readiness.stop()
+		if app_instance.state.classification_log is not None:
+			await app_instance.state.classification_log.stop()
+		await app_instance.state.events.stop()
+		await app_instance.state.accessory_catalog.stop()
+		await app_instance.state.db_engine.dispose()
+		await close_classifier_client()
 
 	app = FastAPI(
 		title="PocketZot API",
@@ -37,21 +92,39 @@ def create_app() -> FastAPI:
 		allow_credentials=True,
 		allow_methods=["*"],
 		allow_headers=["*"],
+		expose_headers=[NEXT_CURSOR_HEADER],
 	)
+	app.add_middleware(MetricsMiddleware)
 
 	@app.get("/")
 	async def root() -> dict[str, str]:
 		return {"service": "PocketZot API", "status": "ok"}
 
+	# Probes only read results the readiness monitor gathered in the
+	# background, so they never wait on the database or OpenAI.
+	@app.get("/livez")
+	async def livez() -> dict[str, str]:
+		return {"status": "ok"}
+
+	@app.get("/readyz")
+	async def readyz() -> JSONResponse:
+		snapshot = app.state.readiness.snapshot()
+		return JSONResponse(snapshot, status_code=200 if snapshot["ready"] else 503)
+
 	@app.get("/health")
-	async def health() -> dict[str, str]:
-		db_connected = check_db_connection(app.state.db_engine)
+	async def health() -> dict:
+		db_connected = app.state.readiness.results["database"].ok
 		return {
 			"status": "healthy" if db_connected else "degraded",
 			"database": "connected" if db_connected else "disconnected",
+			"pool": pool_stats(app.state.db_engine),
 			"timestamp": datetime.now(timezone.utc).isoformat(),
 		}
 
+	@app.get("/metrics", include_in_schema=False)
+	async def metrics() -> Response:
+		return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
+
 	@app.post("/api/echo")
 	async def echo(payload: EchoRequest) -> dict[str, str]:
 		return {"echo": payload.message}
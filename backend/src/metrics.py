@@ -0,0 +1,156 @@
+"""
+Prometheus metrics for the API, served at /metrics.
+
+Request, query and upstream timings are recorded as they happen; counters
+that components already keep in their stats() dicts (caches, pool, log
+writer) are read at scrape time through register_stats().
+"""
+import re
+import time
+from collections.abc import Callable
+
+from prometheus_client import CollectorRegistry, Counter, Histogram
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+REGISTRY = CollectorRegistry()
+
+HTTP_REQUESTS = Counter(
+	"pocketzot_http_requests_total",
+	"HTTP requests by route template and status code.",
+	["method", "route", "status"],
+	registry=REGISTRY,
+)
+HTTP_REQUEST_SECONDS = Histogram(
+	"pocketzot_http_request_duration_seconds",
+	"Time until the response headers were sent.",
+	["method", "route"],
+	registry=REGISTRY,
+)
+DB_QUERY_SECONDS = Histogram(
+	"pocketzot_db_query_duration_seconds",
+	"Statement execution time by query name.",
+	["query"],
+	buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+	registry=REGISTRY,
+)
+OPENAI_REQUEST_SECONDS = Histogram(
+	"pocketzot_openai_request_duration_seconds",
+	"Chat completion latency, including SDK retries.",
+	["model", "outcome"],
+	buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0),
+	registry=REGISTRY,
+)
+OPENAI_TOKENS = Counter(
+	"pocketzot_openai_tokens_total",
+	"Tokens reported by chat completion responses.",
+	["model", "kind"],
+	registry=REGISTRY,
+)
+
+_TABLE_RE = re.compile(r"\b(?:FROM|INTO|UPDATE)\s+([a-z_][a-z0-9_]*)", re.IGNORECASE)
+
+
+class MetricsMiddleware:
+	"""ASGI middleware counting requests per route template.
+
+	Labels use the matched route's path ("/api/anteaters/{anteater_id}"), so
+	the label set stays bounded; paths that match no route share "unmatched".
+	"""
+
+	def __init__(self, app):
+		self.app = app
+
+	async def __call__(self, scope, receive, send):
+		if scope["type"] != "http":
+			await self.app(scope, receive, send)
+			return
+
+		started = time.perf_counter()
+		status_code = 500
+
+		async def send_wrapper(message):
+			nonlocal status_code
+			if message["type"] == "http.response.start":
+				status_code = message["status"]
+				route = scope.get("route")
+				path = getattr(route, "path", "unmatched")
+				HTTP_REQUEST_SECONDS.labels(scope["method"], path).observe(time.perf_counter() - started)
+				HTTP_REQUESTS.labels(scope["method"], path, str(status_code)).inc()
+			await send(message)
+
+		await self.app(scope, receive, send_wrapper)
+
+
+def _statement_label(statement: str) -> str:
+	"""Low-cardinality fallback name for statements without a query_name."""
+	words = statement.split(None, 1)
+	if not words:
+		return "other"
+	match = _TABLE_RE.search(statement)
+	verb = words[0].lower()
+	return f"{verb} {match.group(1).lower()}" if match else verb
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+	"""Time every statement; the label is the query_name execution option if set."""
+
+	@event.listens_for(engine.sync_engine, "before_cursor_execute")
+	def _before(conn, cursor, statement, parameters, context, executemany):
+		conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+	@event.listens_for(engine.sync_engine, "after_cursor_execute")
+	def _after(conn, cursor, statement, parameters, context, executemany):
+		started = conn.info["query_started"].pop()
+		name = context.execution_options.get("query_name") if context is not None else None
+		DB_QUERY_SECONDS.labels(name or _statement_label(statement)).observe(time.perf_counter() - started)
+
+	@event.listens_for(engine.sync_engine, "handle_error")
+	def _error(exception_context):
+		connection = exception_context.connection
+		if connection is not None and connection.info.get("query_started"):
+			connection.info["query_started"].pop()
+
+
+def observe_completion(model: str, seconds: float, outcome: str, usage=None) -> None:
+	OPENAI_REQUEST_SECONDS.labels(model, outcome).observe(seconds)
+	if usage is not None:
+		OPENAI_TOKENS.labels(model, "prompt").inc(usage.prompt_tokens or 0)
+		OPENAI_TOKENS.labels(model, "completion").inc(usage.completion_tokens or 0)
+
+
+class _StatsCollector:
+	def __init__(self):
+		self.sources: dict[str, Callable[[], dict | None]] = {}
+
+	def collect(self):
+		for source, read_stats in self.sources.items():
+			stats = read_stats()
+			if stats is None:
+				continue
+			for key, value in _flatten(stats):
+				gauge = GaugeMetricFamily(f"pocketzot_{source}_{key}", f"{source} {key.replace('_', ' ')}")
+				gauge.add_metric([], float(value))
+				yield gauge
+
+
+def _flatten(stats: dict, prefix: str = ""):
+	for key, value in stats.items():
+		name = f"{prefix}{key}"
+		if isinstance(value, dict):
+			yield from _flatten(value, f"{name}_")
+		elif isinstance(value, (bool, int, float)):
+			yield name, value
+
+
+_stats = _StatsCollector()
+REGISTRY.register(_stats)
+
+
+def register_stats(source: str, read_stats: Callable[[], dict | None]) -> None:
+	"""Expose the numeric entries of read_stats() as pocketzot_<source>_* gauges.
+
+	Registering the same source again replaces the earlier reader.
+	"""
+	_stats.sources[source] = read_stats
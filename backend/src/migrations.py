@@ -0,0 +1,136 @@
+"""
+Versioned migration runner for backend/schema/migration_*.sql.
+
+Each file is applied once, in version order, and recorded in
+schema_migrations together with a checksum of its contents. A file runs in
+a single transaction, so a failure leaves nothing half-applied. Files whose
+first line is
+
+	-- migrate:no-transaction
+
+run statement by statement in autocommit mode instead, which is what
+CREATE INDEX CONCURRENTLY requires. Such files are split on ';', so they must
+not contain semicolons inside literals or function bodies. They should also
+stay idempotent (IF NOT EXISTS), since a failure part-way through leaves the
+earlier statements applied.
+
+A session-level advisory lock serializes runners, so several app instances
+can start at once and only one of them applies the pending files.
+"""
+import hashlib
+import logging
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_DIR = Path(__file__).resolve().parents[1] / "schema"
+NO_TRANSACTION_MARKER = "-- migrate:no-transaction"
+
+# Arbitrary but fixed key shared by every runner ("pzmigrat" as a bigint).
+ADVISORY_LOCK_KEY = int.from_bytes(b"pzmigrat", "big")
+
+_MIGRATION_FILE_RE = re.compile(r"^migration_(\d+)_(\w+)\.sql$")
+
+# Run migration SQL exactly as written: with no parameters the driver is
+# called without any, so a literal % (LIKE 'a%', RAISE NOTICE '%') is not
+# parsed as a placeholder.
+_VERBATIM = {"no_parameters": True}
+
+_CREATE_VERSIONS_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+	version INT PRIMARY KEY,
+	name VARCHAR(255) NOT NULL,
+	checksum CHAR(64) NOT NULL,
+	applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+_RECORD_VERSION = text(
+	"""
+	INSERT INTO schema_migrations (version, name, checksum)
+	VALUES (:version, :name, :checksum)
+	"""
+)
+
+
+@dataclass(frozen=True)
+class Migration:
+	version: int
+	name: str
+	sql: str
+
+	@property
+	def checksum(self) -> str:
+		return hashlib.sha256(self.sql.encode("utf-8")).hexdigest()
+
+	@property
+	def transactional(self) -> bool:
+		first_line = self.sql.lstrip().split("\n", 1)[0].strip()
+		return first_line != NO_TRANSACTION_MARKER
+
+	def statements(self) -> list[str]:
+		lines = [line for line in self.sql.splitlines() if not line.strip().startswith("--")]
+		return [statement.strip() for statement in "\n".join(lines).split(";") if statement.strip()]
+
+
+def discover_migrations(schema_dir: Path = SCHEMA_DIR) -> list[Migration]:
+	migrations: dict[int, Migration] = {}
+	for path in schema_dir.glob("migration_*.sql"):
+		match = _MIGRATION_FILE_RE.match(path.name)
+		if match is None:
+			raise RuntimeError(f"Unrecognized migration file name: {path.name}")
+		version = int(match.group(1))
+		if version in migrations:
+			raise RuntimeError(f"Duplicate migration version {version}: {path.name}")
+		migrations[version] = Migration(version=version, name=path.name, sql=path.read_text(encoding="utf-8"))
+	return [migrations[version] for version in sorted(migrations)]
+
+
+def _apply(engine: Engine, migration: Migration) -> None:
+	record = {"version": migration.version, "name": migration.name, "checksum": migration.checksum}
+
+	if migration.transactional:
+		with engine.begin() as connection:
+			connection.exec_driver_sql(migration.sql, execution_options=_VERBATIM)
+			connection.execute(_RECORD_VERSION, record)
+		return
+
+	with engine.connect() as connection:
+		connection.execution_options(isolation_level="AUTOCOMMIT")
+		for statement in migration.statements():
+			connection.exec_driver_sql(statement, execution_options=_VERBATIM)
+		connection.execute(_RECORD_VERSION, record)
+
+
+def run_migrations(engine: Engine, schema_dir: Path = SCHEMA_DIR) -> list[Migration]:
+	"""Apply every pending migration and return the ones that were applied."""
+	migrations = discover_migrations(schema_dir)
+	applied_now = []
+
+	with engine.connect() as lock_connection:
+		lock_connection.execution_options(isolation_level="AUTOCOMMIT")
+		lock_connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": ADVISORY_LOCK_KEY})
+		try:
+			with engine.begin() as connection:
+				connection.exec_driver_sql(_CREATE_VERSIONS_TABLE)
+				applied = dict(
+					connection.execute(text("SELECT version, checksum FROM schema_migrations")).all()
+				)
+
+			for migration in migrations:
+				if migration.version in applied:
+					if applied[migration.version].strip() != migration.checksum:
+						logger.warning("%s changed after it was applied; not re-running it", migration.name)
+					continue
+				logger.info("Applying %s", migration.name)
+				_apply(engine, migration)
+				applied_now.append(migration)
+		finally:
+			lock_connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": ADVISORY_LOCK_KEY})
+
+	return applied_now
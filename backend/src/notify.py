@@ -0,0 +1,37 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+
+import psycopg
+from psycopg import sql
+
+from .db import get_psycopg_conninfo
+
+logger = logging.getLogger(__name__)
+
+
+async def listen_forever(
+	channel: str,
+	on_notify: Callable[[str], Awaitable[None]],
+	on_connect: Callable[[], Awaitable[None]] | None = None,
+	retry_seconds: float = 5.0,
+) -> None:
+	"""LISTEN on a Postgres channel until cancelled, reconnecting on errors.
+
+	on_connect runs after every (re)connection once LISTEN is active, so
+	callers can resynchronize state that may have changed while the
+	connection was down.
+	"""
+	while True:
+		try:
+			async with await psycopg.AsyncConnection.connect(get_psycopg_conninfo(), autocommit=True) as connection:
+				await connection.execute(sql.SQL("LISTEN {}").format(sql.Identifier(channel)))
+				if on_connect is not None:
+					await on_connect()
+				async for notification in connection.notifies():
+					await on_notify(notification.payload)
+		except asyncio.CancelledError:
+			raise
+		except Exception:
+			logger.exception("LISTEN %s failed; reconnecting in %.0fs", channel, retry_seconds)
+			await asyncio.sleep(retry_seconds)
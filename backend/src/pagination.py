@@ -0,0 +1,90 @@
+from collections.abc import AsyncIterator, Iterable, Iterator
+
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import TextClause
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+MAX_PAGE_SIZE = 1000
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+NEXT_CURSOR_HEADER = "X-Next-After-Id"
+
+# Rows fetched per round-trip from the server-side cursor while streaming.
+STREAM_BATCH_SIZE = 500
+
+
+def keyset_params(after_id: int | None, limit: int | None) -> dict:
+	"""Bind values for the keyset filter the list queries share:
+
+		WHERE id > COALESCE(CAST(:after_id AS INTEGER), 0)
+		ORDER BY id
+		LIMIT CAST(:limit AS INTEGER)
+
+	A NULL limit means LIMIT ALL, which keeps unpaginated callers working.
+	"""
+	return {"after_id": after_id, "limit": limit}
+
+
+class JsonList:
+	"""Fast JSON path for list routes.
+
+	The whole list is validated and serialized with one pydantic-core call
+	each, and the Response is returned directly so FastAPI skips its own
+	response_model pass. Without it every row is validated once by
+	model_validate and again by FastAPI before being encoded.
+	"""
+
+	def __init__(self, model: type[BaseModel]):
+		self._adapter = TypeAdapter(list[model])
+
+	def response(self, rows: Iterable, response: Response | None = None) -> Response:
+		"""JSON Response for rows, carrying any headers already set on response."""
+		body = self._adapter.dump_json(self._adapter.validate_python(rows), by_alias=True)
+		headers = dict(response.headers) if response is not None else None
+		return Response(body, media_type="application/json", headers=headers)
+
+
+def wants_ndjson(request: Request, stream: bool) -> bool:
+	return stream or NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def set_next_cursor(response: Response, rows: list, limit: int | None) -> None:
+	"""Advertise the cursor for the next page when this one came back full."""
+	if limit is not None and rows and len(rows) == limit:
+		response.headers[NEXT_CURSOR_HEADER] = str(rows[-1]["id"])
+
+
+def stream_ndjson(
+	engine: AsyncEngine,
+	query: TextClause,
+	params: dict,
+	model: type[BaseModel],
+) -> StreamingResponse:
+	"""Stream query rows as NDJSON through a server-side cursor.
+
+	Rows are pulled from the database in STREAM_BATCH_SIZE chunks and written
+	out one line each, so memory stays flat regardless of table size.
+	"""
+
+	async def lines() -> AsyncIterator[str]:
+		async with engine.connect() as connection:
+			result = await connection.stream(
+				query,
+				params,
+				execution_options={"yield_per": STREAM_BATCH_SIZE},
+			)
+			async for row in result.mappings():
+				yield model.model_validate(row).model_dump_json(by_alias=True) + "\n"
+
+	return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
+
+
+def ndjson_response(rows: Iterable, model: type[BaseModel], headers: dict | None = None) -> StreamingResponse:
+	"""NDJSON for rows that are already in memory (e.g. a cached catalog)."""
+
+	def lines() -> Iterator[str]:
+		for row in rows:
+			yield model.model_validate(row).model_dump_json(by_alias=True) + "\n"
+
+	return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE, headers=headers)
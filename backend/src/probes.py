@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import os
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CheckResult:
+	ok: bool
+	checked_at: float | None = None
+	latency_ms: float | None = None
+	error: str | None = None
+
+
+@dataclass(frozen=True)
+class _Check:
+	name: str
+	run: Callable[[], Awaitable[None]]
+	required: bool
+
+
+class ReadinessMonitor:
+	"""Runs dependency checks on an interval and keeps the latest results.
+
+	Probe endpoints only read results, so they cost no I/O and never wait
+	on a slow dependency. A check passes when run() returns within timeout
+	without raising. Until the first round finishes every check reads as
+	failed, so a starting instance is not reported ready early.
+	"""
+
+	def __init__(self, interval: float = 5.0, timeout: float = 2.0):
+		self.interval = interval
+		self.timeout = timeout
+		self._checks: list[_Check] = []
+		self.results: dict[str, CheckResult] = {}
+		self._task: asyncio.Task | None = None
+
+	@classmethod
+	def from_env(cls) -> "ReadinessMonitor":
+		return cls(
+			interval=float(os.getenv("READINESS_CHECK_INTERVAL_SECONDS", "5")),
+			timeout=float(os.getenv("READINESS_CHECK_TIMEOUT_SECONDS", "2")),
+		)
+
+	def add_check(self, name: str, run: Callable[[], Awaitable[None]], required: bool = True) -> None:
+		self._checks.append(_Check(name, run, required))
+		self.results[name] = CheckResult(ok=False)
+
+	def start(self) -> None:
+		self._task = asyncio.create_task(self._run(), name="readiness-monitor")
+
+	async def stop(self) -> None:
+		if self._task is None:
+			return
+		self._task.cancel()
+		await asyncio.gather(self._task, return_exceptions=True)
+		self._task = None
+
+	async def _run(self) -> None:
+		while True:
+			await asyncio.gather(*(self._run_check(check) for check in self._checks))
+			await asyncio.sleep(self.interval)
+
+	async def _run_check(self, check: _Check) -> None:
+		started = time.perf_counter()
+		error = None
+		try:
+			await asyncio.wait_for(check.run(), self.timeout)
+		except asyncio.TimeoutError:
+			error = f"timed out after {self.timeout:g}s"
+		except Exception as exc:
+			error = str(exc) or type(exc).__name__
+		if error is not None and self.results[check.name].ok:
+			logger.warning("Readiness check %s started failing: %s", check.name, error)
+		self.results[check.name] = CheckResult(
+			ok=error is None,
+			checked_at=time.time(),
+			latency_ms=round((time.perf_counter() - started) * 1000, 2),
+			error=error,
+		)
+
+	@property
+	def ready(self) -> bool:
+		return all(self.results[check.name].ok for check in self._checks if check.required)
+
+	def snapshot(self) -> dict:
+		return {
+			"ready": self.ready,
+			"checks": {
+				check.name: {**vars(self.results[check.name]), "required": check.required}
+				for check in self._checks
+			},
+		}
@@ -0,0 +1,464 @@
+"""
+Named SQL statements shared by the routers.
+
+Each statement is built once at import time rather than per request, and
+carries a query_name execution option that labels its timings in /metrics.
+psycopg prepares a statement server-side once it has run
+DB_PREPARE_THRESHOLD times on a connection, so the hot ones are parsed and
+planned by Postgres once per connection instead of on every call.
+"""
+from sqlalchemy import TextClause, text
+
+
+def _query(name: str, sql: str) -> TextClause:
+	return text(sql).execution_options(query_name=name)
+
+
+# Users
+
+USER_PAGE = _query(
+	"user_page",
+	"""
+	SELECT id, name, email, COALESCE(ants, 0) AS ants
+	FROM users
+	WHERE id > COALESCE(CAST(:after_id AS INTEGER), 0)
+	ORDER BY id
+	LIMIT CAST(:limit AS INTEGER)
+	""",
+)
+
+UPSERT_USER = _query(
+	"upsert_user",
+	"""
+	INSERT INTO users (name, email)
+	VALUES (:name, :email)
+	ON CONFLICT (email)
+	DO UPDATE SET name = EXCLUDED.name
+	RETURNING id, name, email, COALESCE(ants, 0) AS ants
+	""",
+)
+
+USER_BY_ID = _query(
+	"user_by_id",
+	"""
+	SELECT id, name, email, COALESCE(ants, 0) AS ants
+	FROM users
+	WHERE id = :user_id
+	""",
+)
+
+USER_BY_EMAIL = _query(
+	"user_by_email",
+	"""
+	SELECT id, name, email, COALESCE(ants, 0) AS ants
+	FROM users
+	WHERE email = :email
+	""",
+)
+
+USER_SNAPSHOT = _query(
+	"user_snapshot",
+	"""
+	WITH profile AS (
+		SELECT id, name, email, COALESCE(ants, 0) AS ants
+		FROM users
+		WHERE id = :user_id
+	),
+	alive AS (
+		SELECT id, name, health, is_dead, uid
+		FROM anteater
+		WHERE uid = :user_id AND is_dead = FALSE
+	),
+	owned AS (
+		SELECT id, uid, accessory_id, anteater_id
+		FROM has_accessory
+		WHERE uid = :user_id
+	)
+	SELECT
+		(SELECT row_to_json(profile) FROM profile) AS profile,
+		(SELECT row_to_json(alive) FROM alive) AS anteater,
+		COALESCE(
+			(SELECT json_agg(owned ORDER BY owned.id DESC) FROM owned),
+			CAST('[]' AS JSON)
+		) AS owned
+	""",
+)
+
+
+# Anteaters
+
+ANTEATER_PAGE = _query(
+	"anteater_page",
+	"""
+	SELECT id, name, health, is_dead, uid
+	FROM anteater
+	WHERE id > COALESCE(CAST(:after_id AS INTEGER), 0)
+	ORDER BY id
+	LIMIT CAST(:limit AS INTEGER)
+	""",
+)
+
+INSERT_ANTEATER = _query(
+	"insert_anteater",
+	"""
+	INSERT INTO anteater (name, health, is_dead, uid)
+	VALUES (:name, :health, :is_dead, :uid)
+	RETURNING id, name, health, is_dead, uid
+	""",
+)
+
+ALIVE_ANTEATER_WITH_ACCESSORIES = _query(
+	"alive_anteater_with_accessories",
+	"""
+	SELECT a.id, a.name, a.health, a.is_dead, a.uid, u.ants,
+	       CASE WHEN CAST(:include_accessories AS BOOLEAN) THEN COALESCE(
+	           (
+	               SELECT json_agg(json_build_object(
+	                   'id', ha.id,
+	                   'uid', ha.uid,
+	                   'accessory_id', ha.accessory_id,
+	                   'anteater_id', ha.anteater_id,
+	                   'name', acc.name,
+	                   'price', acc.price,
+	                   'type', acc.type,
+	                   'image_url', acc.image_url,
+	                   'description', acc.description
+	               ) ORDER BY ha.id)
+	               FROM has_accessory ha
+	               JOIN accessories acc ON acc.id = ha.accessory_id
+	               WHERE ha.anteater_id = a.id
+	           ),
+	           CAST('[]' AS JSON)
+	       ) END AS accessories
+	FROM anteater a
+	JOIN users u ON u.id = a.uid
+	WHERE a.uid = :uid AND a.is_dead = FALSE
+	""",
+)
+
+ANTEATER_BY_ID = _query(
+	"anteater_by_id",
+	"""
+	SELECT id, name, health, is_dead, uid
+	FROM anteater
+	WHERE id = :anteater_id
+	""",
+)
+
+MARK_ANTEATER_DEAD = _query(
+	"mark_anteater_dead",
+	"""
+	UPDATE anteater
+	SET is_dead = TRUE
+	WHERE id = :anteater_id
+	RETURNING id, name, health, is_dead, uid
+	""",
+)
+
+ANTEATER_WITH_ANTS = _query(
+	"anteater_with_ants",
+	"""
+	SELECT a.id, a.name, a.health, a.is_dead, a.uid, u.ants
+	FROM anteater a
+	JOIN users u ON u.id = a.uid
+	WHERE a.id = :anteater_id
+	""",
+)
+
+RENAME_ALIVE_ANTEATER = _query(
+	"rename_alive_anteater",
+	"""
+	UPDATE anteater
+	SET name = :name
+	WHERE id = :anteater_id AND is_dead = FALSE
+	RETURNING id, name, health, is_dead, uid
+	""",
+)
+
+FIRST_ANTEATER_FOR_USER = _query(
+	"first_anteater_for_user",
+	"""
+	SELECT id, name, health, is_dead, uid
+	FROM anteater
+	WHERE uid = :uid
+	ORDER BY id ASC
+	LIMIT 1
+	""",
+)
+
+RENAME_ANTEATER = _query(
+	"rename_anteater",
+	"""
+	UPDATE anteater
+	SET name = :name
+	WHERE id = :anteater_id
+	RETURNING id, name, health, is_dead, uid
+	""",
+)
+
+# Lock the anteater and its owner, fold the deltas over (health, ants) in
+# order and write both rows back in one statement, so concurrent updates
+# serialize on the row locks instead of overwriting each other. The
+# recursive fold applies exactly the per-delta rules, so a batch ends in the
+# same state as sending its deltas one by one. updated_user runs even though
+# the final SELECT does not reference it.
+# DAMAGE: ants absorb first, then health takes the remainder.
+# HEALING: apply to health, overflow becomes ants.
+APPLY_HEALTH_DELTAS = _query(
+	"apply_health_deltas",
+	"""
+	WITH RECURSIVE params AS (
+		SELECT CAST(:min_health AS INTEGER) AS min_health,
+		       CAST(:max_health AS INTEGER) AS max_health
+	),
+	deltas AS (
+		SELECT d.delta, d.step
+		FROM unnest(CAST(:scaled_deltas AS INTEGER[])) WITH ORDINALITY AS d(delta, step)
+	),
+	current_state AS (
+		SELECT a.id, a.uid, a.health, u.ants
+		FROM anteater a
+		JOIN users u ON u.id = a.uid
+		WHERE a.id = :anteater_id
+		FOR UPDATE OF a, u
+	),
+	fold AS (
+		SELECT c.id, c.uid, CAST(0 AS BIGINT) AS step, c.health, c.ants
+		FROM current_state c
+		UNION ALL
+		SELECT f.id, f.uid, d.step,
+		       CASE WHEN d.delta < 0
+		            THEN GREATEST(p.min_health, f.health - GREATEST(0, -d.delta - f.ants))
+		            ELSE LEAST(p.max_health, f.health + d.delta)
+		       END,
+		       CASE WHEN d.delta < 0
+		            THEN GREATEST(0, f.ants + d.delta)
+		            ELSE f.ants + GREATEST(0, f.health + d.delta - p.max_health)
+		       END
+		FROM fold f
+		JOIN deltas d ON d.step = f.step + 1
+		CROSS JOIN params p
+	),
+	next_state AS (
+		SELECT f.id, f.uid, f.health, f.ants, c.ants AS previous_ants
+		FROM fold f
+		JOIN current_state c ON c.id = f.id
+		ORDER BY f.step DESC
+		LIMIT 1
+	),
+	updated_anteater AS (
+		UPDATE anteater
+		SET health = n.health,
+		    is_dead = (n.health <= 0)
+		FROM next_state n
+		WHERE anteater.id = n.id
+		RETURNING anteater.id, anteater.name, anteater.health, anteater.is_dead, anteater.uid
+	),
+	updated_user AS (
+		UPDATE users
+		SET ants = n.ants
+		FROM next_state n
+		WHERE users.id = n.uid AND n.ants <> n.previous_ants
+	)
+	SELECT ua.id, ua.name, ua.health, ua.is_dead, ua.uid, n.ants
+	FROM updated_anteater ua
+	JOIN next_state n ON n.id = ua.id
+	""",
+)
+
+
+# Ants
+
+USER_ANTS = _query(
+	"user_ants",
+	"""
+	SELECT id, name, email, ants
+	FROM users
+	WHERE id = :uid
+	""",
+)
+
+USER_WITH_ALIVE_ANTEATER = _query(
+	"user_with_alive_anteater",
+	"""
+	SELECT users.id, users.name, users.email, users.ants as current_ants,
+	       COALESCE(anteater.health, 0) as current_health,
+	       anteater.id as anteater_id,
+	       anteater.name as anteater_name
+	FROM users
+	LEFT JOIN anteater ON anteater.uid = users.id AND anteater.is_dead = FALSE
+	WHERE users.id = :uid
+	""",
+)
+
+SET_USER_ANTS = _query(
+	"set_user_ants",
+	"""
+	UPDATE users
+	SET ants = :count
+	WHERE id = :uid
+	""",
+)
+
+SET_ALIVE_ANTEATER_HEALTH = _query(
+	"set_alive_anteater_health",
+	"""
+	UPDATE anteater
+	SET health = :health,
+	    is_dead = (:health <= 0)
+	WHERE uid = :uid AND is_dead = FALSE
+	RETURNING id, name, health, is_dead, uid
+	""",
+)
+
+PURCHASE_ANTS = _query(
+	"purchase_ants",
+	"""
+	WITH debit AS (
+		UPDATE users
+		SET ants = ants - :delta
+		WHERE id = :uid AND ants >= :delta
+		RETURNING id, name, email, ants
+	)
+	SELECT EXISTS (SELECT 1 FROM users WHERE id = :uid) AS user_found,
+	       debit.id, debit.name, debit.email, debit.ants,
+	       COALESCE(anteater.health, 0) as health,
+	       anteater.id as anteater_id,
+	       anteater.name as anteater_name
+	FROM (SELECT 1) AS outcome
+	LEFT JOIN debit ON TRUE
+	LEFT JOIN anteater ON anteater.uid = debit.id AND anteater.is_dead = FALSE
+	""",
+)
+
+
+# Accessories
+
+OWNED_ACCESSORIES = _query(
+	"owned_accessories",
+	"""
+	SELECT id, uid, accessory_id, anteater_id
+	FROM has_accessory
+	WHERE uid = :uid
+	ORDER BY id DESC
+	""",
+)
+
+BUY_ACCESSORY = _query(
+	"buy_accessory",
+	"""
+	WITH debit AS (
+		UPDATE users
+		SET ants = ants - CAST(:price AS INTEGER)
+		WHERE id = :uid AND ants >= CAST(:price AS INTEGER)
+		RETURNING id, ants
+	),
+	purchase AS (
+		INSERT INTO has_accessory (uid, accessory_id)
+		SELECT id, CAST(:accessory_id AS INTEGER)
+		FROM debit
+		RETURNING id, uid, accessory_id, anteater_id
+	)
+	SELECT EXISTS (SELECT 1 FROM users WHERE id = :uid) AS user_found,
+	       p.id, p.uid, p.accessory_id, p.anteater_id, d.ants
+	FROM (SELECT 1) AS outcome
+	LEFT JOIN purchase p ON TRUE
+	LEFT JOIN debit d ON TRUE
+	""",
+)
+
+OWNED_ACCESSORY_IDS = _query(
+	"owned_accessory_ids",
+	"""
+	SELECT id, accessory_id
+	FROM has_accessory
+	WHERE uid = :uid
+	ORDER BY id
+	""",
+)
+
+USER_ACCESSORY_TYPE = _query(
+	"user_accessory_type",
+	"""
+	SELECT ha.uid, a.type
+	FROM has_accessory ha
+	JOIN accessories a ON ha.accessory_id = a.id
+	WHERE ha.id = :id
+	""",
+)
+
+ALIVE_ANTEATER_ID = _query(
+	"alive_anteater_id",
+	"""
+	SELECT id FROM anteater WHERE uid = :uid AND is_dead = FALSE
+	""",
+)
+
+UNEQUIP_SAME_TYPE = _query(
+	"unequip_same_type",
+	"""
+	UPDATE has_accessory
+	SET anteater_id = NULL
+	WHERE anteater_id = :anteater_id
+	AND uid = :uid
+	AND accessory_id IN (
+		SELECT id FROM accessories WHERE type = :type
+	)
+	""",
+)
+
+EQUIP_USER_ACCESSORY = _query(
+	"equip_user_accessory",
+	"""
+	UPDATE has_accessory
+	SET anteater_id = :anteater_id
+	WHERE id = :id
+	""",
+)
+
+USER_ACCESSORY_DETAIL = _query(
+	"user_accessory_detail",
+	"""
+	SELECT ha.id, ha.uid, ha.accessory_id, ha.anteater_id,
+	       a.name, a.price, a.type, a.image_url, a.description
+	FROM has_accessory ha
+	JOIN accessories a ON ha.accessory_id = a.id
+	WHERE ha.id = :id
+	""",
+)
+
+UNEQUIP_USER_ACCESSORY = _query(
+	"unequip_user_accessory",
+	"""
+	UPDATE has_accessory
+	SET anteater_id = NULL
+	WHERE id = :id
+	""",
+)
+
+EQUIPPED_ACCESSORIES = _query(
+	"equipped_accessories",
+	"""
+	SELECT ha.id, ha.uid, ha.accessory_id, ha.anteater_id,
+	       a.name, a.price, a.type, a.image_url, a.description
+	FROM has_accessory ha
+	JOIN accessories a ON ha.accessory_id = a.id
+	WHERE ha.anteater_id = :anteater_id
+	ORDER BY ha.id
+	""",
+)
+
+CLEAR_INVENTORY = _query(
+	"clear_inventory",
+	"""
+	DELETE FROM has_accessory WHERE uid = :uid
+	""",
+)
+
+DELETE_USER_ACCESSORY = _query(
+	"delete_user_accessory",
+	"""
+	DELETE FROM has_accessory
+	WHERE id = :id
+	""",
+)
@@ -0,0 +1,62 @@
+"""
+Request coalescing for identical concurrent calls.
+
+While a call for a key is in flight, further callers with the same key wait
+for that call instead of starting their own, and all of them get its result
+or its exception. The call runs as its own task, so one caller being
+cancelled (a client disconnecting) does not cancel it for the others; it is
+only cancelled once every caller waiting on it has gone away.
+"""
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+
+class _Call:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls: dict[str, _Call] = {}
+        self.calls = 0
+        self.coalesced = 0
+        self.abandoned = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Return fn()'s result, sharing one call among concurrent callers of key."""
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Forget the key now, not in the done callback a loop turn
+                # later, so a new caller starts a fresh call instead of
+                # joining the one being cancelled.
+                self._forget(key, call)
+                call.task.cancel()
+                self.abandoned += 1
+
+    def _forget(self, key: str, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._calls),
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "abandoned": self.abandoned,
+        }
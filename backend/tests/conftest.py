@@ -0,0 +1,78 @@
+import os
+import sys
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import pytest
+
+# Tests import the app as the "src" package, like uvicorn src.main:create_app.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+# Read when src.api.classifier is imported. Tests never call OpenAI: the
+# app under test classifies locally and remote backends are stubbed.
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+os.environ["CLASSIFIER_BACKEND"] = "local"
+
+SCHEMA_DIR = Path(__file__).resolve().parents[1] / "schema"
+SCRATCH_SCHEMA = "pytest_scratch"
+
+
+@pytest.fixture
+def scratch_url():
+	"""psycopg URL whose search_path is an empty scratch schema, dropped afterwards.
+
+	Tests that need Postgres use this and are skipped unless DB_CONNECTION is set.
+	"""
+	if not os.getenv("DB_CONNECTION"):
+		pytest.skip("DB_CONNECTION is not set")
+	pytest.importorskip("psycopg")
+	sqlalchemy = pytest.importorskip("sqlalchemy")
+
+	from src.db import get_psycopg_database_url
+
+	url = sqlalchemy.make_url(get_psycopg_database_url())
+	admin = sqlalchemy.create_engine(url)
+	with admin.begin() as connection:
+		connection.exec_driver_sql(f"DROP SCHEMA IF EXISTS {SCRATCH_SCHEMA} CASCADE")
+		connection.exec_driver_sql(f"CREATE SCHEMA {SCRATCH_SCHEMA}")
+	try:
+		yield url.update_query_dict({"options": f"-csearch_path={SCRATCH_SCHEMA}"})
+	finally:
+		with admin.begin() as connection:
+			connection.exec_driver_sql(f"DROP SCHEMA IF EXISTS {SCRATCH_SCHEMA} CASCADE")
+		admin.dispose()
+
+
+@pytest.fixture
+def schema_url(scratch_url):
+	"""scratch_url with schema.sql applied."""
+	from sqlalchemy import create_engine
+
+	engine = create_engine(scratch_url)
+	with engine.begin() as connection:
+		connection.exec_driver_sql((SCHEMA_DIR / "schema.sql").read_text(), execution_options={"no_parameters": True})
+	engine.dispose()
+	return scratch_url
+
+
+@pytest.fixture
+def app_client(schema_url, monkeypatch):
+	"""Factory for (app, httpx client) pairs serving create_app() over ASGI, lifespan included."""
+	httpx = pytest.importorskip("httpx")
+	monkeypatch.setenv("DB_CONNECTION", schema_url.render_as_string(hide_password=False))
+	monkeypatch.setenv("RUN_MIGRATIONS_ON_STARTUP", "false")
+	monkeypatch.setenv("CATALOG_LISTEN", "false")
+	monkeypatch.setenv("CATALOG_REFRESH_SECONDS", "0")
+	monkeypatch.setenv("EVENTS_FANOUT", "local")
+
+	from src.main import create_app
+
+	@asynccontextmanager
+	async def client():
+		app = create_app()
+		async with app.router.lifespan_context(app):
+			transport = httpx.ASGITransport(app=app)
+			async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+				yield app, http
+
+	return client
@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("psycopg")
+
+import psycopg
+from sqlalchemy import event
+
+from src.db import get_psycopg_conninfo
+
+
+def test_count_update_publishes_no_health_for_an_anteater_killed_meanwhile(app_client):
+	async def scenario():
+		async with app_client() as (app, http):
+			async with app.state.db_engine.begin() as connection:
+				await connection.exec_driver_sql("INSERT INTO users (name, email, ants) VALUES ('u', 'u@example.com', 0)")
+				await connection.exec_driver_sql("INSERT INTO anteater (name, health, is_dead, uid) VALUES ('a', 50, FALSE, 1)")
+
+			# Another request kills the anteater right after the route read it.
+			@event.listens_for(app.state.db_engine.sync_engine, "after_cursor_execute")
+			def kill_after_read(conn, cursor, statement, parameters, context, executemany):
+				if context.execution_options.get("query_name") == "user_with_alive_anteater":
+					with psycopg.connect(get_psycopg_conninfo(), autocommit=True) as other:
+						other.execute("UPDATE anteater SET is_dead = TRUE WHERE uid = 1")
+
+			async with app.state.events.subscribe(1) as queue:
+				response = await http.patch("/api/ants/user/1/count", json={"delta": -1})
+				assert response.status_code == 200
+				events = [queue.get_nowait()["event"] for _ in range(queue.qsize())]
+
+			async with app.state.db_engine.connect() as connection:
+				health = (await connection.exec_driver_sql("SELECT health FROM anteater WHERE uid = 1")).scalar_one()
+			return events, health
+
+	events, health = asyncio.run(scenario())
+	assert events == ["ants"]
+	assert health == 50
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("psycopg")
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.events import EventHub
+
+
+async def _published_events(url, fanout):
+	engine = create_async_engine(url)
+	hub = EventHub(engine, fanout)
+	hub.start()
+	try:
+		async with engine.begin() as connection:
+			await connection.exec_driver_sql("CREATE TABLE parent (id INT PRIMARY KEY)")
+			await connection.exec_driver_sql(
+				"CREATE TABLE child (parent_id INT REFERENCES parent DEFERRABLE INITIALLY DEFERRED)"
+			)
+		# Give the LISTEN connection time to subscribe.
+		await asyncio.sleep(0.3 if fanout == "notify" else 0)
+
+		async with hub.subscribe(1) as queue:
+			with pytest.raises(RuntimeError):
+				async with hub.transaction() as connection:
+					await hub.publish(connection, 1, "change", {"outcome": "rolled back"})
+					raise RuntimeError("handler failed")
+
+			# The deferred foreign key only fails at COMMIT.
+			with pytest.raises(IntegrityError):
+				async with hub.transaction() as connection:
+					await hub.publish(connection, 1, "change", {"outcome": "commit failed"})
+					await connection.exec_driver_sql("INSERT INTO child VALUES (42)")
+
+			async with hub.transaction() as connection:
+				await hub.publish(connection, 1, "change", {"outcome": "committed"})
+				assert queue.empty(), "delivered before COMMIT"
+
+			await asyncio.sleep(0.3 if fanout == "notify" else 0)
+			return [queue.get_nowait()["data"]["outcome"] for _ in range(queue.qsize())]
+	finally:
+		await hub.stop()
+		await engine.dispose()
+
+
+@pytest.mark.parametrize("fanout", ["local", "notify"])
+def test_events_are_delivered_only_after_a_successful_commit(scratch_url, fanout):
+	assert asyncio.run(_published_events(scratch_url, fanout)) == ["committed"]
+
+
+def test_publish_outside_transaction_is_rejected(scratch_url):
+	async def scenario():
+		engine = create_async_engine(scratch_url)
+		try:
+			async with engine.begin() as connection:
+				await EventHub(engine).publish(connection, 1, "change", {})
+		finally:
+			await engine.dispose()
+
+	with pytest.raises(RuntimeError):
+		asyncio.run(scenario())
@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("psycopg")
+
+from src.api.anteater import ANT_HEALTH_MULTIPLIER
+
+
+def test_parallel_health_deltas_lose_no_updates(app_client):
+	"""Bursts of one sign are order-independent, so the end state is exact."""
+
+	async def scenario():
+		async with app_client() as (app, http):
+			async with app.state.db_engine.begin() as connection:
+				await connection.exec_driver_sql("INSERT INTO users (name, email, ants) VALUES ('u', 'u@example.com', 1000)")
+				await connection.exec_driver_sql("INSERT INTO anteater (name, health, is_dead, uid) VALUES ('a', 50, FALSE, 1)")
+
+			async def state():
+				anteater = (await http.get("/api/anteaters/1")).json()
+				ants = (await http.get("/api/ants/user/1")).json()["ants"]
+				return anteater["health"], ants
+
+			# 40 x -1: ants absorb all 480 damage
+			responses = await asyncio.gather(*(
+				http.patch("/api/anteaters/1/health", json={"delta": -1}) for _ in range(40)
+			))
+			assert all(response.status_code == 200 for response in responses)
+			after_damage = await state()
+
+			# 60 x +2 through both routes: health tops out, the rest becomes ants
+			responses = await asyncio.gather(
+				*(http.patch("/api/anteaters/1/health", json={"delta": 2}) for _ in range(30)),
+				*(http.patch("/api/anteaters/1/health/batch", json={"deltas": [2, 2]}) for _ in range(15)),
+			)
+			assert all(response.status_code == 200 for response in responses)
+			after_healing = await state()
+			return after_damage, after_healing
+
+	after_damage, after_healing = asyncio.run(scenario())
+	assert after_damage == (50, 1000 - 40 * ANT_HEALTH_MULTIPLIER)
+	healing = 60 * 2 * ANT_HEALTH_MULTIPLIER
+	assert after_healing == (100, after_damage[1] + healing - 50)
@@ -0,0 +1,89 @@
+import json
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("psycopg")
+
+from sqlalchemy import create_engine, text
+
+from src import queries
+
+SCHEMA_DIR = Path(__file__).resolve().parents[1] / "schema"
+
+HOT_LOOKUP_INDEXES = [
+	"uq_anteater_alive_per_user",
+	"idx_anteater_uid",
+	"idx_has_accessory_uid_accessory_id",
+	"idx_has_accessory_anteater_id",
+	"idx_has_accessory_accessory_id",
+	"idx_accessories_type",
+]
+
+SEED_SQL = """
+INSERT INTO users (name, email, ants)
+SELECT 'user ' || n, 'user' || n || '@example.com', 0 FROM generate_series(1, 200) AS n;
+
+INSERT INTO accessories (name, price, type)
+SELECT 'accessory ' || n, 10, 'type-' || n % 10 FROM generate_series(1, 50) AS n;
+
+INSERT INTO anteater (name, health, is_dead, uid)
+SELECT 'anteater', 100, k < 3, u FROM generate_series(1, 200) AS u, generate_series(1, 3) AS k;
+
+INSERT INTO has_accessory (uid, accessory_id, anteater_id)
+SELECT u, 1 + (u + k) % 50, CASE WHEN k = 1 THEN u * 3 ELSE NULL END
+FROM generate_series(1, 200) AS u, generate_series(1, 3) AS k;
+
+ANALYZE;
+"""
+
+# (statement, expected index); router statements where one exists
+CHECKS = [
+	(queries.ALIVE_ANTEATER_ID, "uq_anteater_alive_per_user"),
+	(text("SELECT id, name, health, is_dead, uid FROM anteater WHERE uid = :uid"), "idx_anteater_uid"),
+	(queries.OWNED_ACCESSORY_IDS, "idx_has_accessory_uid_accessory_id"),
+	(queries.EQUIPPED_ACCESSORIES, "idx_has_accessory_anteater_id"),
+	# What deleting an accessory checks through the has_accessory foreign key
+	(text("SELECT id FROM has_accessory WHERE accessory_id = :accessory_id"), "idx_has_accessory_accessory_id"),
+	(queries.UNEQUIP_SAME_TYPE, "idx_accessories_type"),
+]
+
+PARAMS = {"uid": 100, "anteater_id": 300, "accessory_id": 25, "type": "type-7"}
+
+
+def _index_names(plan):
+	names = {plan["Index Name"]} if "Index Name" in plan else set()
+	for child in plan.get("Plans", []):
+		names |= _index_names(child)
+	return names
+
+
+@pytest.fixture(params=["schema.sql", "migration_003"])
+def engine(request, schema_url):
+	"""schema.sql as-is, or with the indexes dropped and recreated by migration_003."""
+	engine = create_engine(schema_url)
+	with engine.begin() as connection:
+		if request.param == "migration_003":
+			for index in HOT_LOOKUP_INDEXES:
+				connection.exec_driver_sql(f"DROP INDEX {index}")
+			connection.exec_driver_sql(
+				(SCHEMA_DIR / "migration_003_add_hot_lookup_indexes.sql").read_text(),
+				execution_options={"no_parameters": True},
+			)
+		connection.exec_driver_sql(SEED_SQL, execution_options={"no_parameters": True})
+	try:
+		yield engine
+	finally:
+		engine.dispose()
+
+
+@pytest.mark.parametrize("statement, expected", CHECKS, ids=[expected for _, expected in CHECKS])
+def test_hot_lookups_use_their_index(engine, statement, expected):
+	with engine.connect() as connection:
+		# The table is small; make the planner show which index it would use.
+		connection.exec_driver_sql("SET enable_seqscan = off")
+		plan = connection.execute(text(f"EXPLAIN (FORMAT JSON) {statement.text}"), PARAMS).scalar_one()
+	if isinstance(plan, str):
+		plan = json.loads(plan)
+	assert expected in _index_names(plan[0]["Plan"])
@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("openai")
+
+from src.api.classifier import (
+    CLASSIFIER_LOCAL_THRESHOLD,
+    CascadeClassifierBackend,
+    Classification,
+    LocalClassifierBackend,
+)
+from src.local_classifier import DEFAULT_DATASET_PATH, LocalClassifier, LocalPrediction, load_examples
+
+ALLOWED_VALUES = {-3, -2, -1, 1, 2}
+
+PROMPTS = [
+    "Write my essay about the French Revolution",
+    "Explain how photosynthesis works",
+    "Compare mitosis and meiosis",
+    "Ask me guiding questions about recursion so I can figure it out",
+    "Why is my argument about free will convincing?",
+    "asdf qwerty zxcv",
+]
+
+
+class StubRemoteBackend:
+    name = "remote"
+
+    def __init__(self):
+        self.prompts = []
+
+    async def warm_up(self) -> None:
+        pass
+
+    async def classify(self, prompt: str) -> Classification:
+        self.prompts.append(prompt)
+        return Classification(value=1, suggestion=None, raw_response='{"value": 1}', backend=self.name)
+
+    def stats(self) -> dict:
+        return {"name": self.name}
+
+
+class FixedLocalBackend:
+    """Local backend whose confidence is set by the test."""
+
+    name = "local"
+
+    def __init__(self, confidence: float):
+        self.confidence = confidence
+
+    async def warm_up(self) -> None:
+        pass
+
+    async def classify(self, prompt: str) -> Classification:
+        return Classification(value=-2, suggestion=None, raw_response='{"value": -2}', backend=self.name, confidence=self.confidence)
+
+    def stats(self) -> dict:
+        return {"name": self.name}
+
+
+@pytest.fixture(scope="module")
+def model():
+    return LocalClassifier.from_dataset()
+
+
+def test_predictions_are_taxonomy_values_with_bounded_confidence(model):
+    prompts = PROMPTS + [example.prompt for example in load_examples(DEFAULT_DATASET_PATH)[:20]]
+    for prompt in prompts:
+        prediction = model.predict(prompt)
+        assert isinstance(prediction, LocalPrediction)
+        assert prediction.value in ALLOWED_VALUES
+        assert 0.0 <= prediction.confidence <= 1.0
+
+
+def test_cascade_escalates_only_below_the_threshold(model):
+    local = LocalClassifierBackend()
+    local._model = model
+    remote = StubRemoteBackend()
+    cascade = CascadeClassifierBackend(local, remote, CLASSIFIER_LOCAL_THRESHOLD)
+
+    async def classify_all():
+        return [await cascade.classify(prompt) for prompt in PROMPTS]
+
+    results = asyncio.run(classify_all())
+
+    uncertain = [prompt for prompt in PROMPTS if model.predict(prompt).confidence < CLASSIFIER_LOCAL_THRESHOLD]
+    assert remote.prompts == uncertain
+    assert cascade.escalations == len(uncertain)
+    assert cascade.local_answers == len(PROMPTS) - len(uncertain)
+    for prompt, result in zip(PROMPTS, results):
+        assert result.backend == ("remote" if prompt in uncertain else "local")
+
+
+@pytest.mark.parametrize(
+    "confidence, escalated",
+    [
+        (CLASSIFIER_LOCAL_THRESHOLD - 0.01, True),
+        (CLASSIFIER_LOCAL_THRESHOLD, False),
+        (CLASSIFIER_LOCAL_THRESHOLD + 0.01, False),
+    ],
+)
+def test_cascade_threshold_boundary(confidence, escalated):
+    remote = StubRemoteBackend()
+    cascade = CascadeClassifierBackend(FixedLocalBackend(confidence), remote, CLASSIFIER_LOCAL_THRESHOLD)
+
+    result = asyncio.run(cascade.classify("Compare mitosis and meiosis"))
+
+    assert bool(remote.prompts) is escalated
+    assert result.backend == ("remote" if escalated else "local")
@@ -0,0 +1,47 @@
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("psycopg")
+
+from sqlalchemy import create_engine, text
+
+from src.migrations import run_migrations
+
+PERCENT_MIGRATION = """
+CREATE TABLE widgets (name TEXT NOT NULL);
+INSERT INTO widgets (name) VALUES ('apple'), ('banana'), ('100%');
+CREATE VIEW a_widgets AS SELECT name FROM widgets WHERE name LIKE 'a%';
+DO $$
+BEGIN
+	RAISE NOTICE 'widgets: %', (SELECT count(*) FROM widgets);
+END
+$$;
+"""
+
+PERCENT_NO_TRANSACTION_MIGRATION = """-- migrate:no-transaction
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_widgets_percent ON widgets (name) WHERE name LIKE '%\\%';
+INSERT INTO widgets (name) SELECT 'widget ' || n % 3 FROM generate_series(1, 3) AS n;
+"""
+
+
+@pytest.fixture
+def engine(scratch_url):
+	engine = create_engine(scratch_url)
+	try:
+		yield engine
+	finally:
+		engine.dispose()
+
+
+def test_migrations_with_literal_percent_run_verbatim(engine, tmp_path):
+	(tmp_path / "migration_001_percent.sql").write_text(PERCENT_MIGRATION)
+	(tmp_path / "migration_002_percent_concurrently.sql").write_text(PERCENT_NO_TRANSACTION_MIGRATION)
+
+	applied = run_migrations(engine, tmp_path)
+
+	assert [migration.version for migration in applied] == [1, 2]
+	with engine.connect() as connection:
+		assert connection.execute(text("SELECT name FROM a_widgets")).scalars().all() == ["apple"]
+		assert connection.execute(text("SELECT count(*) FROM widgets")).scalar_one() == 6
+		assert connection.execute(text("SELECT count(*) FROM schema_migrations")).scalar_one() == 2
+	assert run_migrations(engine, tmp_path) == []
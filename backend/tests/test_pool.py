@@ -0,0 +1,85 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("psycopg")
+
+from sqlalchemy import event, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from src.db import get_db_engine, pool_stats
+
+CONNECT_DELAY = 0.3
+
+
+@pytest.fixture
+def engine(monkeypatch):
+	if not os.getenv("DB_CONNECTION"):
+		pytest.skip("DB_CONNECTION is not set")
+	monkeypatch.setenv("DB_POOL_SIZE", "1")
+	monkeypatch.setenv("DB_MAX_OVERFLOW", "0")
+	monkeypatch.setenv("DB_POOL_TIMEOUT_SECONDS", "1")
+	engine = get_db_engine()
+
+	@event.listens_for(engine.sync_engine, "do_connect")
+	def _slow_connect(dialect, connection_record, cargs, cparams):
+		time.sleep(CONNECT_DELAY)
+
+	try:
+		yield engine
+	finally:
+		asyncio.run(engine.dispose())
+
+
+def test_opening_a_connection_is_not_counted_as_waiting(engine):
+	async def run():
+		async with engine.connect() as connection:
+			await connection.execute(text("SELECT 1"))
+
+	asyncio.run(run())
+	stats = pool_stats(engine)
+	assert stats["checkouts"] == 1
+	assert stats["connects"] == 1
+	assert stats["connect_seconds_max"] >= CONNECT_DELAY
+	assert stats["wait_seconds_max"] < CONNECT_DELAY
+
+
+def test_queued_checkout_is_counted_as_waiting(engine):
+	hold = 0.3
+
+	async def checkout():
+		async with engine.connect() as connection:
+			await connection.execute(text("SELECT 1"))
+
+	async def run():
+		held = await engine.connect()
+		try:
+			waiting = asyncio.create_task(checkout())
+			await asyncio.sleep(hold)
+		finally:
+			await held.close()
+		await waiting
+
+	asyncio.run(run())
+	stats = pool_stats(engine)
+	assert stats["checkouts"] == 2
+	assert stats["connects"] == 1
+	assert stats["wait_seconds_max"] >= hold - 0.05
+
+
+def test_checkout_timeout_is_counted(engine):
+	async def run():
+		held = await engine.connect()
+		try:
+			with pytest.raises(PoolTimeoutError):
+				await engine.connect()
+		finally:
+			await held.close()
+
+	asyncio.run(run())
+	stats = pool_stats(engine)
+	assert stats["checkout_timeouts"] == 1
+	assert stats["wait_seconds_max"] >= 0.9
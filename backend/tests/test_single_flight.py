@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from src.single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call_and_key_is_removed():
+    async def scenario():
+        flights = SingleFlight()
+        started = 0
+
+        async def work():
+            nonlocal started
+            started += 1
+            await asyncio.sleep(0.01)
+            return "answer"
+
+        results = await asyncio.gather(*(flights.do("key", work) for _ in range(5)))
+        await asyncio.sleep(0)
+        return flights, started, results
+
+    flights, started, results = asyncio.run(scenario())
+    assert results == ["answer"] * 5
+    assert started == 1
+    assert flights.stats() == {"in_flight": 0, "calls": 1, "coalesced": 4, "abandoned": 0}
+    assert flights._calls == {}
+
+
+def test_exception_reaches_every_waiter():
+    async def scenario():
+        flights = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.01)
+            raise ValueError("upstream failed")
+
+        results = await asyncio.gather(*(flights.do("key", work) for _ in range(3)), return_exceptions=True)
+        await asyncio.sleep(0)
+        return flights, results
+
+    flights, results = asyncio.run(scenario())
+    assert len(results) == 3
+    assert all(isinstance(result, ValueError) and str(result) == "upstream failed" for result in results)
+    assert flights._calls == {}
+
+
+def test_one_waiter_cancelling_does_not_cancel_the_others():
+    async def scenario():
+        flights = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.02)
+            return "answer"
+
+        first = asyncio.create_task(flights.do("key", work))
+        second = asyncio.create_task(flights.do("key", work))
+        await asyncio.sleep(0.005)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return flights, await second
+
+    flights, result = asyncio.run(scenario())
+    assert result == "answer"
+    assert flights.abandoned == 0
+
+
+def test_rejoin_after_last_waiter_cancels_starts_a_fresh_call():
+    async def scenario():
+        flights = SingleFlight()
+        started = 0
+
+        async def work():
+            nonlocal started
+            started += 1
+            await asyncio.sleep(0.01)
+            return started
+
+        abandoned = asyncio.create_task(flights.do("key", work))
+        await asyncio.sleep(0.001)
+        abandoned.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await abandoned
+        # Same loop turn as the cancellation: the old task has not finished yet.
+        result = await flights.do("key", work)
+        await asyncio.sleep(0)
+        return flights, started, result
+
+    flights, started, result = asyncio.run(scenario())
+    assert started == 2
+    assert result == 2
+    assert flights.stats() == {"in_flight": 0, "calls": 2, "coalesced": 0, "abandoned": 1}
@@ -6,11 +6,47 @@
 var CLASSIFY_URL = 'http://localhost:8000/api/classify/';
 var BACKEND_URL = 'http://localhost:8000';
 
+// A delta for an anteater with no update in flight is sent right away.
+// Deltas that arrive while one is in flight queue up and go together to
+// /health/batch (which applies them in order in one transaction) when it
+// finishes, at most MAX_HEALTH_DELTAS_PER_BATCH per request to match the
+// backend's limit.
+var MAX_HEALTH_DELTAS_PER_BATCH = 100;
+var pendingHealth = {};
+var healthInFlight = {};
+
 function updateHealthWithAnteater(anteaterDetails, delta, sendResponse) {
-  fetch(BACKEND_URL + '/api/anteaters/' + anteaterDetails.id + '/health', {
+  var id = anteaterDetails.id;
+  var pending = pendingHealth[id];
+  if (!pending) {
+    pending = pendingHealth[id] = { details: anteaterDetails, deltas: [], callbacks: [] };
+  }
+  pending.deltas.push(delta);
+  pending.callbacks.push(sendResponse);
+  if (!healthInFlight[id]) {
+    flushHealth(id);
+  }
+}
+
+function flushHealth(id) {
+  var queued = pendingHealth[id];
+  if (!queued) return;
+  // Each delta has exactly one callback, so both are taken in step.
+  var pending = {
+    details: queued.details,
+    deltas: queued.deltas.splice(0, MAX_HEALTH_DELTAS_PER_BATCH),
+    callbacks: queued.callbacks.splice(0, MAX_HEALTH_DELTAS_PER_BATCH)
+  };
+  if (!queued.deltas.length) {
+    delete pendingHealth[id];
+  }
+  healthInFlight[id] = true;
+
+  var anteaterDetails = pending.details;
+  fetch(BACKEND_URL + '/api/anteaters/' + id + '/health/batch', {
     method: 'PATCH',
     headers: { 'Content-Type': 'application/json' },
-    body: JSON.stringify({ delta: delta })
+    body: JSON.stringify({ deltas: pending.deltas })
   })
     .then(function (r) {
       if (!r.ok) throw new Error('HTTP ' + r.status);
@@ -27,11 +63,20 @@ function updateHealthWithAnteater(anteaterDetails, delta, sendResponse) {
           isDead: result.isDead
         }
       });
-      sendResponse({ ok: true, data: result });
+      pending.callbacks.forEach(function (sendResponse) {
+        sendResponse({ ok: true, data: result });
+      });
     })
     .catch(function (err) {
       console.error('[PocketZot] health update error:', err);
-      sendResponse({ ok: false, error: err.message });
+      pending.callbacks.forEach(function (sendResponse) {
+        sendResponse({ ok: false, error: err.message });
+      });
+    })
+    .finally(function () {
+      delete healthInFlight[id];
+      // Send whatever queued up while this request was in flight.
+      flushHealth(id);
     });
 }
 
@@ -96,13 +141,12 @@ chrome.runtime.onMessage.addListener(function (message, _sender, sendResponse) {
       }
 
       // If no anteater details in storage, fetch them for the user
-      console.log('[PocketZot] Fetching anteater list for userId:', userId);
-      fetch(BACKEND_URL + '/api/anteaters')
-        .then(function (r) { return r.json(); })
-        .then(function (list) {
-          var found = list.find(function (a) { return a.uid === userId; });
+      console.log('[PocketZot] Fetching anteater for userId:', userId);
+      fetch(BACKEND_URL + '/api/anteaters/user/' + userId)
+        .then(function (r) { return r.ok ? r.json() : null; })
+        .then(function (found) {
           if (!found) {
-            console.error('[PocketZot] No anteater found for user', userId, 'in list:', list);
+            console.error('[PocketZot] No anteater found for user', userId);
             sendResponse({ ok: false, error: 'No anteater found for user ' + userId });
             return;
           }
@@ -111,7 +155,7 @@ chrome.runtime.onMessage.addListener(function (message, _sender, sendResponse) {
           updateHealthWithAnteater(found, message.delta, sendResponse);
         })
         .catch(function (err) {
-          console.error('[PocketZot] Failed to fetch anteater list:', err);
+          console.error('[PocketZot] Failed to fetch anteater:', err);
           sendResponse({ ok: false, error: 'Failed to fetch anteater: ' + err.message });
         });
     });
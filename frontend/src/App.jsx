@@ -120,10 +120,9 @@ useEffect(() => {
       });
     }
     
-    fetch(`${BACKEND_URL}/api/anteaters`)
-      .then(r => r.json())
-      .then(list => {
-        const userAnt = list.find(a => a.uid === user.id) || null;
+    fetch(`${BACKEND_URL}/api/anteaters/user/${user.id}`)
+      .then(r => (r.ok ? r.json() : null))
+      .then(userAnt => {
         setAnteater(userAnt);
         
         // Cache the anteater in chrome storage for background script
@@ -135,7 +134,7 @@ useEffect(() => {
               uid: user.id,
               name: userAnt.name,
               health: userAnt.health,
-              ants: user.ants || 0,
+              ants: userAnt.ants ?? user.ants ?? 0,
               isDead: userAnt.is_dead || false
             }
           });
@@ -170,9 +169,9 @@ useEffect(() => {
       applyClassificationList(changes.pocketzot_classifications.newValue);
 
       if (user) {
-        fetch(`${BACKEND_URL}/api/anteaters`)
-          .then(r => r.json())
-          .then(list => setAnteater(list.find(a => a.uid === user.id) || null))
+        fetch(`${BACKEND_URL}/api/anteaters/user/${user.id}`)
+          .then(r => (r.ok ? r.json() : null))
+          .then(setAnteater)
           .catch(() => {});
       }
     };
@@ -197,10 +196,9 @@ useEffect(() => {
 
     const trimmedName = name.trim();
 
-    fetch(`${BACKEND_URL}/api/anteaters`)
-      .then((r) => (r.ok ? r.json() : []))
-      .then((list) => {
-        const existing = list.find((a) => a.uid === user.id);
+    fetch(`${BACKEND_URL}/api/anteaters/user/${user.id}`)
+      .then((r) => (r.ok ? r.json() : null))
+      .then((existing) => {
 
         if (existing) {
           return fetch(`${BACKEND_URL}/api/anteaters/${existing.id}/name`, {
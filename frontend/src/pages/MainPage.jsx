@@ -22,12 +22,31 @@ export default function MainPage({ user, onShop, onStart }) {
 
   useEffect(() => {
     if (!user) return;
-    fetch(`${BACKEND_URL}/api/anteaters`)
-      .then((r) => r.json())
-      .then((list) => setAnteater(list.find((a) => a.uid === user.id) || null))
+    fetch(`${BACKEND_URL}/api/anteaters/user/${user.id}`)
+      .then((r) => (r.ok ? r.json() : null))
+      .then(setAnteater)
       .catch(() => {});
   }, [user]);
 
+  // Server push: health, ants and death changes made anywhere (e.g. by
+  // classifications in another tab) show up without re-fetching.
+  useEffect(() => {
+    if (!user || typeof EventSource === "undefined") return;
+    const events = new EventSource(`${BACKEND_URL}/api/users/${user.id}/events`);
+    const applyState = (e) => {
+      const state = JSON.parse(e.data);
+      setAnteater((prev) => (prev && prev.id === state.id ? { ...prev, ...state } : prev));
+    };
+    const applyAnts = (e) => {
+      const { ants } = JSON.parse(e.data);
+      setAnteater((prev) => (prev ? { ...prev, ants } : prev));
+    };
+    events.addEventListener("health", applyState);
+    events.addEventListener("death", applyState);
+    events.addEventListener("ants", applyAnts);
+    return () => events.close();
+  }, [user]);
+
   useEffect(() => {
     refreshSpawnStatus();
 
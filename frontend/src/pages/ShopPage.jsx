@@ -87,14 +87,6 @@ export default function ShopPage({ user, onBack, onUserUpdate }) {
   const [clickFeedbackId, setClickFeedbackId] = useState(null);
   const ants = user?.ants ?? 0;
 
-  useEffect(() => {
-    if (!user) return;
-    fetch(`${BACKEND_URL}/api/anteaters`)
-      .then((r) => r.json())
-      .then((list) => setAnteater(list.find((a) => a.uid === user.id) || null))
-      .catch(() => {});
-  }, [user]);
-
   useEffect(() => {
     if (typeof chrome === "undefined" || !chrome.storage?.local) return;
     chrome.storage.local.get("pocketzot_equipped_hat", (data) => {
@@ -109,13 +101,6 @@ export default function ShopPage({ user, onBack, onUserUpdate }) {
     return () => chrome.storage.onChanged.removeListener(listener);
   }, []);
 
-  const fetchShop = () => {
-    fetch(`${BACKEND_URL}/api/accessories/user/${uid}/shop`)
-      .then((r) => r.json())
-      .then(setItems)
-      .catch(() => setItems([]));
-  };
-
   const fetchInventory = () => {
     fetch(`${BACKEND_URL}/api/accessories/user/${uid}/inventory`)
       .then((r) => r.json())
@@ -123,9 +108,24 @@ export default function ShopPage({ user, onBack, onUserUpdate }) {
       .catch(() => setInventory([]));
   };
 
+  // One request for the shop, inventory, anteater and user on open.
+  const loadSnapshot = () =>
+    fetch(`${BACKEND_URL}/api/users/${uid}/snapshot`)
+      .then((r) => (r.ok ? r.json() : null))
+      .then((snapshot) => {
+        setItems(snapshot?.shop ?? []);
+        setInventory(snapshot?.inventory ?? []);
+        if (user) setAnteater(snapshot?.anteater ?? null);
+        return snapshot;
+      })
+      .catch(() => {
+        setItems([]);
+        setInventory([]);
+        return null;
+      });
+
   useEffect(() => {
-    fetchShop();
-    fetchInventory();
+    loadSnapshot();
   }, [uid]);
 
   const handleBuy = async (e) => {
@@ -144,13 +144,8 @@ export default function ShopPage({ user, onBack, onUserUpdate }) {
         throw new Error(err.detail ?? "Purchase failed");
       }
       const bought = await res.json();
-      fetchShop();
-      fetchInventory();
-      if (onUserUpdate) {
-        const userRes = await fetch(`${BACKEND_URL}/api/users/${uid}`);
-        const u = await userRes.json();
-        onUserUpdate(u);
-      }
+      const snapshot = await loadSnapshot();
+      if (onUserUpdate && snapshot) onUserUpdate(snapshot.user);
       setConfirming(null);
     } catch (e) {
       setError(e.message ?? "Could not purchase");